@@ -1,154 +1,142 @@
 import streamlit as st
-from your_cleaning_script import NoonCleaner, AmazonCleaner, RevibeCleaner, TalabatCleaner, CareemCleaner  # Import your class from your main code
-import os
-import tempfile
+from your_cleaning_script import CLEANERS, detect_marketplace, master_catalog  # Import your class from your main code
+from jobs import JobStore
+import json
+import time
 
 st.set_page_config(page_title="Cleaning Toos", layout="centered")
 st.title("Sales Data Cleaning Tool")
 
+# Preview me ek page par kitni rows
+PREVIEW_PAGE_SIZE = 100
+# Running job ka status kitni der me dobara check ho (seconds)
+POLL_SECONDS = 0.5
+
+
+@st.cache_resource
+def job_store():
+    # Sab sessions ka ek hi bounded worker pool + job store (cleaned results ka cache bhi)
+    return JobStore()
+
+
+@st.cache_resource
+def product_catalog():
+    # product.csv process me ek baar load, sab sessions / jobs share karte hain
+    return master_catalog.refresh()
+
+
+def show_stage_report(cleaner, option):
+    # Har stage ka time / rows / memory - kaunsa step slow hai
+    report = cleaner.stage_report()
+    with st.expander(f"Stage Timings ({report['total_seconds']:.2f}s)"):
+        st.dataframe([{k: v for k, v in row.items() if k != 'profile'} for row in report['stages']])
+        if report.get('catalog_match'):
+            # Kis tier ne kitni rows ka Brand / Category fill kiya
+            st.caption("Catalog match rate per tier")
+            st.dataframe(report['catalog_match'])
+        for row in report['stages']:
+            if row.get('profile'):
+                st.text(f"--- {row['stage']} ---\n{row['profile']}")
+        st.download_button(
+            label="Download Stage Report",
+            data=json.dumps(report, indent=2, default=str),
+            file_name=f"Stage_Report_{option}.json",
+            mime="application/json"
+        )
+
+
+def show_summary(job):
+    # GMV / QTY rollup: Channel, Country, Nub Partner, Brand, Category, Month
+    if job.summary is None:
+        return
+    with st.expander(f"GMV Summary ({len(job.summary)} groups)"):
+        st.dataframe(job.summary)
+        st.download_button(
+            label="Download GMV Summary",
+            data=job.summary.to_csv(index=False),
+            file_name=f"GMV_Summary_{job.marketplace}.csv",
+            mime="text/csv"
+        )
+
+
+def show_preview(job):
+    # Paginated preview: sirf ek page ka slice render hota hai
+    total = len(job.data)
+    pages = max(1, -(-total // PREVIEW_PAGE_SIZE))
+    page = st.number_input(f"Page (of {pages}, {total} rows)", min_value=1, max_value=pages, value=1, key=f"page_{job.id}")
+    st.dataframe(job.preview(page - 1, PREVIEW_PAGE_SIZE))
+    if job.streamed:
+        # Badi file chunks me clean hui: preview sirf shuruaati rows ka
+        st.caption(f"Large file cleaned in chunks: showing the first {total} of {job.rows} rows")
+
+
+def show_job(job):
+    if job.state in ('queued', 'running'):
+        label = "Waiting for a free worker..." if job.state == 'queued' else f"Cleaning {job.marketplace}: {job.stage or 'starting'}"
+        st.progress(job.progress, text=label)
+        time.sleep(POLL_SECONDS)
+        st.rerun()
+
+    elif job.state == 'failed':
+        st.error(f"Cleaning failed: {job.error}")
+
+    else:
+        # Data preview before download (combined run me: har Channel / Year / Month ki rows)
+        st.subheader("Preview of Cleaned Data" if job.cleaner is not None else "Combined Dataset Partitions")
+        show_preview(job)
+
+        st.success("Data Cleaned Successfully!")
+        show_summary(job)
+        if job.cleaner is not None:
+            show_stage_report(job.cleaner, job.marketplace)
+
+        # Download button
+        st.download_button(
+            label="Download Cleaned File",
+            data=job.read_output(),
+            file_name=f"Cleaned_{job.marketplace}_Data" + job.output_suffix,
+            mime=job.output_mime
+        )
+
+
+st.sidebar.caption(f"Catalog: {len(product_catalog().refresh().data)} products")
+profiler = st.sidebar.selectbox("Profiler", [None, "cprofile", "pyinstrument"], format_func=lambda p: p or "Off")
+
 option = st.selectbox("Choose Marketplace", ["Noon", "Amazon", "Revibe", "Talabat", "Careem"])
 
-uploaded_file = st.file_uploader("Upload CSV or Excel file", type=['csv', 'xlsx', 'xls'])
+uploaded_files = st.file_uploader("Upload CSV or Excel file", type=['csv', 'xlsx', 'xls'], accept_multiple_files=True)
 
-if uploaded_file:
+if len(uploaded_files) == 1:
+    uploaded_file = uploaded_files[0]
     st.success("File upload successfully!")
 
     if st.button("Clean Data"):
-        #------------------------------------------------------------Noon Section--------------------------------------------------------------------------------
-        if option == 'Noon':
-            # Step 1: Temp input file save
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp_input:
-                tmp_input.write(uploaded_file.getbuffer())
-                temp_input_path = tmp_input.name
-            
-            # Step 2: Clean file
-            cleaner = NoonCleaner(temp_input_path)
-            cleaner.clean()
-            
-            # Step 3: Output file save
-            output_fd, output_path = tempfile.mkstemp(suffix=".xlsx")
-            os.close(output_fd)  # close handle, warna Windows block karega
-            cleaner.save_data(output_path)
-
-            # Step 4: Data preview before download
-            st.subheader("Preview of Cleaned Data")
-            st.dataframe(cleaner.data)
-
-            st.success("Data Cleaned Successfully!")
-            
-            # Step 5: Download button
-            with open(output_path, "rb") as f:
-                st.download_button(
-                    label="Download Cleaned File",
-                    data=f,
-                    file_name="Cleaned_Amazon_Data.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
-        
-        
-        #------------------------------------------------------------Amazon Section--------------------------------------------------------------------------------          
-        elif option == 'Amazon':
-            # Step 1: Temp input file save
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp_input:
-                tmp_input.write(uploaded_file.getbuffer())
-                temp_input_path = tmp_input.name
-            
-            # Step 2: Clean file
-            cleaner = AmazonCleaner(temp_input_path)
-            cleaner.clean()
-            
-            # Step 3: Output file save
-            output_fd, output_path = tempfile.mkstemp(suffix=".xlsx")
-            os.close(output_fd)  # close handle, warna Windows block karega
-            cleaner.save_data(output_path)
-
-            # Step 4: Data preview before download
-            st.subheader("Preview of Cleaned Data")
-            st.dataframe(cleaner.data)
-
-            st.success("Data Cleaned Successfully!")
-            
-            # Step 5: Download button
-            with open(output_path, "rb") as f:
-                st.download_button(
-                    label="Download Cleaned File",
-                    data=f,
-                    file_name="Cleaned_Amazon_Data.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
-        
-        
-
-        
-        #------------------------------------------------------------Revibe Section--------------------------------------------------------------------------------    
-        elif option == 'Revibe':            # Step 1: Temp input file save
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp_input:
-                tmp_input.write(uploaded_file.getbuffer())
-                temp_input_path = tmp_input.name
-            
-            # Step 2: Clean file
-            cleaner = RevibeCleaner(temp_input_path)
-            cleaner.clean()
-            
-            # Step 3: Output file save
-            output_fd, output_path = tempfile.mkstemp(suffix=".xlsx")
-            os.close(output_fd)  # close handle, warna Windows block karega
-            cleaner.save_data(output_path)
-            
-            # Step 4: Data preview before download
-            st.subheader("Preview of Cleaned Data")
-            st.dataframe(cleaner.data)
-
-            st.success("Data Cleaned Successfully!")
-            
-            # Step 5: Download button
-            with open(output_path, "rb") as f:
-                st.download_button(
-                    label="Download Cleaned File",
-                    data=f,
-                    file_name="Cleaned_Revibe_Data.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
-            
-
-        #------------------------------------------------------------Talabat Section--------------------------------------------------------------------------------
-        elif option == 'Talabat':
-            cleaner = TalabatCleaner(uploaded_file)
-            cleaner.clean()
-            output_path = "Cleaned_" + option + "_Data.xlsx"
-            cleaner.save_data(output_path)
-            st.success("Data Cleaned Successfully!")
-            with open(output_path, "rb") as f:
-                st.download_button("Download Cleaned File", f, file_name=output_path)
-
-        #------------------------------------------------------------Careem Section--------------------------------------------------------------------------------
-        elif option == 'Careem':
-            cleaner = CareemCleaner(uploaded_file)
-            cleaner.clean()
-            output_path = "Cleaned_" + option + "_Data.xlsx"
-            cleaner.save_data(output_path)
-            st.success("Data Cleaned Successfully!")
-            with open(output_path, "rb") as f:
-                st.download_button("Download Cleaned File", f, file_name=output_path)
+        if option in CLEANERS:
+            # Cleaning background worker me; page sirf job id yaad rakhta hai
+            st.session_state['job_id'] = job_store().submit(option, uploaded_file.getbuffer(), uploaded_file.name, profiler)
         else:
             st.warning(f"{option} cleaning not yet implemented.")
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+elif len(uploaded_files) > 1:
+    # Multiple files: har file ka marketplace header se, sab ek combined dataset me
+    # Detection header parse karta hai: har rerun (job polling bhi) par dobara nahi, file_id se yaad rakho
+    detected = st.session_state.get('detected', {})
+    detected = {f.file_id: detected[f.file_id] if f.file_id in detected else detect_marketplace(f.getbuffer(), f.name)
+                for f in uploaded_files}
+    st.session_state['detected'] = detected
+    files = [(f.name, f.getbuffer(), detected[f.file_id]) for f in uploaded_files]
+    st.success(f"{len(files)} files uploaded successfully!")
+    st.dataframe([{'File': name, 'Marketplace': marketplace or 'Not detected'} for name, _, marketplace in files])
+    unknown = [name for name, _, marketplace in files if marketplace is None]
+    if unknown:
+        st.warning(f"Marketplace not detected for: {', '.join(unknown)}")
+    elif st.button("Clean & Combine"):
+        st.session_state['job_id'] = job_store().submit_consolidated(files)
+
+if 'job_id' in st.session_state:
+    job = job_store().get(st.session_state['job_id'])
+    if job is None:
+        st.info("Previous result expired, please clean the file again.")
+        del st.session_state['job_id']
+    else:
+        show_job(job)
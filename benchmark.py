@@ -0,0 +1,307 @@
+# ===============================
+# BENCHMARK SUITE (synthetic marketplace exports)
+# ===============================
+# Usage:
+#   python benchmark.py                                  # 10k, 100k rows
+#   python benchmark.py --sizes 10k,100k,1M,5M -o bench.json
+#   python benchmark.py --baseline bench.json            # compare with an older run
+#   python benchmark.py --startup-only                   # sirf import / cold catalog load guard
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import your_cleaning_script as ycs
+
+MARKETPLACES = ['Noon', 'Amazon', 'Revibe']
+NOON_STATUSES = ['Shipped', 'Delivered', 'CIR', 'Cancelled', 'Unshipped', 'Pending', 'Processing', 'Returned']
+AMAZON_STATUSES = ['Shipped', 'Cancelled', 'Pending', 'Unshipped', 'Shipping']
+AMAZON_SHEETS = ['Wishcare', '100 MPH', '100_Miles']
+REVIBE_STATUSES = ['Shipped', 'At quality check', 'Refused delivery', 'Cancelled', 'Delivered']
+# Revibe exports me dates mixed formats me aati hain
+REVIBE_DATE_FORMATS = ['%d/%m/%Y %H:%M', '%Y-%m-%d %H:%M:%S', '%d-%m-%Y', '%m/%d/%Y %I:%M %p', '%d %b %Y']
+# Script import par ye modules load nahi hone chahiye (lazy imports)
+HEAVY_MODULES = ['pandas', 'numpy', 'dateutil']
+# Naye interpreter me chalta hai: import time, eager heavy imports, cold catalog load time
+STARTUP_PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import your_cleaning_script as ycs
+imported = time.perf_counter()
+heavy = [name for name in %r if name in sys.modules]
+import pandas
+loaded = time.perf_counter()
+ycs.master_catalog.refresh()
+print(json.dumps({'import': imported - start, 'catalog': time.perf_counter() - loaded, 'heavy': heavy}))
+''' % HEAVY_MODULES
+
+
+def parse_size(text):
+    # '10k' / '1M' / '5000' -> int
+    text = text.strip().lower()
+    scale = {'k': 1_000, 'm': 1_000_000}.get(text[-1], 1)
+    return int(float(text.rstrip('km')) * scale)
+
+
+# ===============================
+# SYNTHETIC DATA (real schemas + product.csv SKUs)
+# ===============================
+def noon_frame(rows, rng, catalog):
+    return pd.DataFrame({
+        'order_timestamp': pd.date_range('2024-01-01', periods=rows, freq='37s').strftime('%Y-%m-%d %H:%M:%S'),
+        'item_nr': np.char.add('NAE', np.arange(rows).astype(str)),
+        'sku': rng.choice(catalog['SKU'].to_numpy(), rows),
+        'status': rng.choice(NOON_STATUSES, rows),
+        'id_partner': rng.choice(list(ycs.NUB_PARTNERS['Noon']) + [99999], rows),
+        'country_code': rng.choice(['SA', 'AE', 'EG'], rows),
+        'partner_sku': rng.choice(catalog['Partner SKU'].to_numpy(), rows),
+        'fulfillment_model': rng.choice(['Fulfilled by Noon (FBN)', 'Fulfilled by Partner (FBP)'], rows),
+        'offer_price': rng.uniform(5, 300, rows).round(2),
+    })
+
+
+def amazon_frame(rows, rng, catalog):
+    return pd.DataFrame({
+        'amazon-order-id': np.char.add('402-', np.arange(rows).astype(str)),
+        'purchase-date': pd.date_range('2024-02-01', periods=rows, freq='53s', tz='UTC').strftime('%Y-%m-%dT%H:%M:%S+00:00'),
+        'sku': rng.choice(catalog['Partner SKU'].to_numpy(), rows),
+        'item-status': rng.choice(AMAZON_STATUSES, rows),
+        'ship-country': rng.choice(['SA', 'AE', 'BH', 'KW', 'OM'], rows),
+        'sales-channel': rng.choice(['Amazon.ae', 'Amazon.sa'], rows),
+        'product-name': rng.choice(catalog['Product Titles'].to_numpy(), rows),
+        'asin': np.char.add('B0', np.arange(rows).astype(str)),
+        'fulfillment-channel': rng.choice(['Amazon', 'Merchant'], rows),
+        'item-price': rng.uniform(5, 300, rows).round(2),
+        'quantity': rng.integers(1, 4, rows),
+    })
+
+
+def revibe_frame(rows, rng, catalog):
+    stamps = pd.date_range('2024-03-01', periods=rows, freq='71s')
+    group = np.arange(rows) % len(REVIBE_DATE_FORMATS)
+    dates = np.empty(rows, dtype=object)
+    for i, fmt in enumerate(REVIBE_DATE_FORMATS):
+        dates[group == i] = stamps[group == i].strftime(fmt)
+    return pd.DataFrame({
+        'Last Update Date': dates,
+        'id': np.arange(rows),
+        'SKU (Old: Order Status)': np.char.add('RV', np.arange(rows).astype(str)),
+        'Shipment Status': rng.choice(REVIBE_STATUSES, rows),
+        'Supplier': rng.choice(['Supplier A', 'Supplier B', 'Supplier C'], rows),
+        'Country': rng.choice(['United Arab Emirates', 'Saudi'], rows),
+        'Category': 'Mobile',
+        'Condition': rng.choice(['Excellent', 'Good', 'Fair'], rows),
+        'Model': rng.choice(['iPhone 13', 'iPhone 14', 'iPhone 15 Pro'], rows),
+        'Variation: Color, Storage, Condition': rng.choice(['Black 128GB', 'Blue 256GB', 'White 512GB'], rows),
+        'Actual Cost': rng.uniform(500, 3000, rows).round(2),
+    })
+
+
+def write_amazon_xlsx(df, path):
+    # Partner sheets me baant ke, har sheet Excel row limit ke andar; zyada rows ho to
+    # aur sheets ('Wishcare 2', ...) taaki file me poori requested rows aayein
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    sheets = max(len(AMAZON_SHEETS), -(-len(df) // (ycs.EXCEL_MAX_ROWS - 1)))
+    per_sheet = -(-len(df) // sheets)
+    for i in range(sheets):
+        part = df.iloc[i * per_sheet:(i + 1) * per_sheet]
+        sheet = AMAZON_SHEETS[i % len(AMAZON_SHEETS)]
+        ws = wb.create_sheet(sheet if i < len(AMAZON_SHEETS) else f"{sheet} {i // len(AMAZON_SHEETS) + 1}")
+        ws.append(list(df.columns))
+        for row in part.itertuples(index=False, name=None):
+            ws.append(row)
+    wb.save(path)
+
+
+def generate(marketplace, rows, data_dir, seed=0):
+    # Generated file cache: same marketplace/size dobara generate nahi hota
+    ext = '.xlsx' if marketplace == 'Amazon' else '.csv'
+    path = os.path.join(data_dir, f"{marketplace.lower()}_{rows}{ext}")
+    if os.path.exists(path):
+        return path
+    rng = np.random.default_rng(seed)
+    catalog = ycs.master_catalog.refresh().data
+    frame = {'Noon': noon_frame, 'Amazon': amazon_frame, 'Revibe': revibe_frame}[marketplace](rows, rng, catalog)
+    print(f"Generating {marketplace} {rows} rows -> {path}")
+    if marketplace == 'Amazon':
+        write_amazon_xlsx(frame, path)
+    else:
+        frame.to_csv(path, index=False)
+    return path
+
+
+# ===============================
+# STAGE TIMING
+# ===============================
+def run_stage(results, marketplace, rows, stage, func, track_memory):
+    start = time.perf_counter()
+    value = func()
+    seconds = time.perf_counter() - start
+    peak_mb = None
+    if track_memory:
+        # Memory alag pass me: tracemalloc chalte hue timing 5-9x slow aati hai
+        tracemalloc.start()
+        try:
+            func()
+            peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+    results.append({'marketplace': marketplace, 'rows': rows, 'stage': stage,
+                    'seconds': round(seconds, 4), 'peak_mb': None if peak_mb is None else round(peak_mb, 1)})
+    print(f"  {marketplace:<7} {rows:>9} {stage:<13} {seconds:9.3f}s" + ('' if peak_mb is None else f" {peak_mb:9.1f} MB"))
+    return value
+
+
+def bench_marketplace(marketplace, rows, path, out_dir, fmt, track_memory, compact=False, workers=1):
+    results = []
+    cleaner = ycs.CLEANERS[marketplace](path, compact=compact, workers=workers)
+    run_stage(results, marketplace, rows, 'read', cleaner.read_data, track_memory)
+    raw = cleaner.data
+
+    # Stages alag alag (raw data par), taaki pata chale time kahan ja raha hai
+    if marketplace == 'Noon':
+        date_stage = lambda: pd.to_datetime(raw['order_timestamp'])
+        partner_stage = lambda: cleaner.map_nub_partner(raw['id_partner'])
+        join_stage = lambda: ycs.master_catalog.lookup(raw['sku'].astype(str).str.strip(), on='SKU')
+    elif marketplace == 'Amazon':
+        date_stage = lambda: pd.to_datetime(raw['purchase-date'])
+        partner_stage = lambda: cleaner.map_nub_partner(raw['Partner ID'])
+        join_stage = lambda: ycs.master_catalog.lookup(raw['sku'].astype(str).str.strip(), on='Partner SKU')
+    else:
+        date_stage = lambda: ycs.parse_mixed_dates(raw['Last Update Date'])
+        partner_stage = None
+        join_stage = None
+
+    run_stage(results, marketplace, rows, 'date_parse', date_stage, track_memory)
+    if partner_stage is not None:
+        run_stage(results, marketplace, rows, 'partner_map', partner_stage, track_memory)
+    if join_stage is not None:
+        run_stage(results, marketplace, rows, 'catalog_join', join_stage, track_memory)
+
+    cleaned = run_stage(results, marketplace, rows, 'clean', lambda: cleaner.finalize(cleaner.transform(raw)), track_memory)
+    clean_row = results[-1]
+    if workers > 1:
+        # Row partitions process pool me (serial 'clean' se compare karo)
+        run_stage(results, marketplace, rows, 'clean_parallel',
+                  lambda: cleaner.finalize(cleaner.transform_partitioned(raw)), track_memory)
+    cleaner.data = cleaned
+    clean_row['frame_mb'] = round(cleaned.memory_usage(deep=True).sum() / 2**20, 1)
+    print(f"  {marketplace:<7} {rows:>9} {'frame':<13} {clean_row['frame_mb']:9.1f} MB")
+    output_file = os.path.join(out_dir, f"clean_{marketplace.lower()}_{rows}{ycs.OUTPUT_FORMATS[fmt][0]}")
+    run_stage(results, marketplace, rows, 'save', lambda: cleaner.save_data(output_file, fmt=fmt), track_memory)
+    return results
+
+
+def bench_startup(repeats=5):
+    # Cold start: har run naya interpreter; catalog CSV se (snapshot off) aur snapshot se
+    results = []
+    runs = {}
+    for stage, snapshot in (('catalog_csv', '0'), ('catalog_snapshot', '1')):
+        env = dict(os.environ, CLEANING_CATALOG_SNAPSHOT=snapshot)
+        runs[stage] = []
+        for _ in range(repeats):
+            out = subprocess.run([sys.executable, '-c', STARTUP_PROBE], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                 env=env, capture_output=True, text=True, check=True)
+            runs[stage].append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    probes = runs['catalog_csv'] + runs['catalog_snapshot']
+    timings = [('import', min(p['import'] for p in probes))]
+    timings += [(stage, min(p['catalog'] for p in runs[stage])) for stage in runs]
+    for stage, seconds in timings:
+        results.append({'marketplace': 'startup', 'rows': 0, 'stage': stage, 'seconds': round(seconds, 4), 'peak_mb': None})
+        print(f"  {'startup':<7} {0:>9} {stage:<16} {seconds * 1000:9.1f} ms")
+    heavy = sorted({name for p in probes for name in p['heavy']})
+    return results, heavy
+
+
+def compare(results, baseline, tolerance):
+    # Baseline se slow stages (seconds ratio > tolerance) report karo
+    old = {(r['marketplace'], r['rows'], r['stage']): r for r in baseline['results']}
+    regressions = 0
+    print("\nComparison with baseline (new / old seconds):")
+    for r in results:
+        before = old.get((r['marketplace'], r['rows'], r['stage']))
+        if before is None or not before['seconds']:
+            continue
+        ratio = r['seconds'] / before['seconds']
+        flag = '  <-- slower' if ratio > tolerance else ''
+        regressions += bool(flag)
+        print(f"  {r['marketplace']:<7} {r['rows']:>9} {r['stage']:<13} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Benchmark cleaners on synthetic marketplace exports")
+    arg_parser.add_argument('--sizes', default='10k,100k', help="comma separated row counts, e.g. 10k,100k,1M,5M")
+    arg_parser.add_argument('--marketplaces', default=','.join(MARKETPLACES))
+    arg_parser.add_argument('--data-dir', help="where generated inputs are kept (default: temp dir)")
+    arg_parser.add_argument('--format', default='parquet', choices=sorted(ycs.OUTPUT_FORMATS), help="save stage format")
+    arg_parser.add_argument('--compact', action='store_true', help="clean with compact (category / downcast) dtypes")
+    arg_parser.add_argument('-j', '--workers', type=int, default=1,
+                            help="also time the row-partitioned parallel clean with this many processes")
+    arg_parser.add_argument('--no-memory', action='store_true', help="skip the separate tracemalloc pass (no peak memory)")
+    arg_parser.add_argument('-o', '--output', help="write results JSON here")
+    arg_parser.add_argument('--baseline', help="results JSON of an earlier run to compare against")
+    arg_parser.add_argument('--tolerance', type=float, default=1.2, help="slowdown ratio counted as regression")
+    arg_parser.add_argument('--max-import-ms', type=float, default=100, help="fail if script import is slower")
+    arg_parser.add_argument('--startup-only', action='store_true', help="only run the import / cold start guard")
+    args = arg_parser.parse_args(argv)
+
+    print("Startup (fresh interpreter, best of 5):")
+    results, heavy = bench_startup()
+    failures = 0
+    if heavy:
+        print(f"  Import guard: {', '.join(heavy)} imported eagerly")
+        failures += 1
+    if results[0]['seconds'] * 1000 > args.max_import_ms:
+        print(f"  Import guard: {results[0]['seconds'] * 1000:.1f} ms > {args.max_import_ms:g} ms")
+        failures += 1
+
+    sizes = [parse_size(s) for s in args.sizes.split(',')]
+    marketplaces = [m.strip() for m in args.marketplaces.split(',')]
+    data_dir = args.data_dir or os.path.join(tempfile.gettempdir(), 'cleaning_bench')
+    os.makedirs(data_dir, exist_ok=True)
+    track_memory = not args.no_memory
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        for rows in sizes if not args.startup_only else []:
+            for marketplace in marketplaces:
+                path = generate(marketplace, rows, data_dir)
+                results += bench_marketplace(marketplace, rows, path, out_dir, args.format, track_memory,
+                                             args.compact, args.workers)
+
+    report = {
+        'meta': {
+            'created': pd.Timestamp.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'format': args.format,
+            'compact': args.compact,
+            'workers': args.workers,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures += compare(results, json.load(f), args.tolerance)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
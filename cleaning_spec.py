@@ -0,0 +1,549 @@
+# ===============================
+# DECLARATIVE CLEANING SPECS + PLAN ENGINE
+# ===============================
+# Har marketplace ka cleaning ek spec (dict / YAML / JSON) hai. compile_spec() usse ek
+# CleaningPlan banata hai jo:
+#   - read time par projection (usecols) karta hai,
+#   - saare derived columns ek hi assign() me banata hai,
+#   - final column order ek hi baar lagata hai.
+#
+# Spec keys:
+#   marketplace  : naam (NUB_PARTNERS / reports)
+#   columns      : {raw column: output column} - projection + rename (None = sab columns rakho)
+#   dtypes       : {raw column: dtype} - read time par explicit dtypes (inference nahi)
+#   date         : {'column', 'parser': 'standard' | 'mixed', 'normalize': bool}
+#   fillna       : {column: value}
+#   derive       : {column: expression} - order me evaluate hote hain, expressions:
+#                    ['const', value]          ['copy', col]
+#                    ['mul', col_a, col_b]     ['concat', [cols], sep]
+#                    ['prefix', text, col]     ['nub_partner', col]
+#                    ['month_name', col]       ['month', col]       ['year', col]
+#   drop_status  : {'column', 'values': [...]} - in values wali rows hata do; reader har chunk
+#                  par raw column pe pehle hi laga deta hai, derived columns se pehle
+#   replace      : {column: {old: new}}
+#   strip        : [columns] - astype(str).str.strip()
+#   catalog      : {'tiers': [...], 'fields': {column: master field}} - fallback chain, har tier:
+#                    {'name', 'keys': {data column: catalog column}, 'normalize': bool}
+#                  pehla matching tier jeetta hai; normalize = case + whitespace ignore.
+#                  Purana {'key': data column, 'on': catalog column} ek exact tier hai.
+#   set_where    : [{'when': {column: value}, 'set': {column: value}}]
+#   order        : final column order (None = jaisa hai)
+#   sort         : finalize me is column par sort
+#   compact      : {column: 'category' | int/float dtype} - compact mode (cleaner compact=True) me
+#                  output dtypes; categories COMPACT_CATEGORIES se stable rehti hain
+import calendar
+import importlib
+import json
+
+
+class LazyModule:
+    # Module proxy: asli import pehle attribute access par (pandas / numpy import ~0.4s,
+    # app cold start aur CLI --help ko ye cost nahi deni chahiye)
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        if self._module is None:
+            self.__dict__['_module'] = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        return f"<lazy module {self._name!r}>"
+
+
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+
+SPEC_KEYS = {
+    'marketplace', 'columns', 'dtypes', 'date', 'fillna', 'derive', 'drop_status', 'replace',
+    'strip', 'catalog', 'set_where', 'order', 'sort', 'compact',
+}
+
+# ===============================
+# NUB PARTNERS (per marketplace)
+# ===============================
+# Naya partner = yahan ek entry, naya elif nahi
+NUB_PARTNERS = {
+    'Noon': {
+        46272: 'Nub-Partner 46272',
+        181587: 'Nub-Partner 181587',
+        47461: 'Nub-Partner 47461',
+        74949: 'Nub-Partner 74949',
+    },
+    'Amazon': {
+        'Wishcare': 'Nub-Partner Wishcare',
+        '100 MPH': 'Nub-Partner 100 MPH',
+        '100_Miles': 'Nub-Partner 100_Miles',
+    },
+}
+NUB_PARTNER_DEFAULT = 'Null'
+
+# Compact mode ke stable category sets (sab marketplaces ke liye same, taaki runs / chunks /
+# marketplaces ke frames concat hone par bhi category hi rahen). List ke bahar ki values
+# sorted order me end me judti hain. Catalog fields (Brand / Category) ki categories catalog se.
+COMPACT_CATEGORIES = {
+    'Month': list(calendar.month_name)[1:],
+    'Country': ['Bahrain', 'Kuwait', 'Oman', 'Saudi', 'UAE'],
+    'Status': ['Cancelled', 'Delivered', 'Returned'],
+    'Channel': ['Amazon', 'Careem', 'Noon', 'Revibe', 'Talabat'],
+    'Fullfilment': ['FBA', 'FBN', 'FBP', 'FBR', 'Merchant'],
+    'Fulfillment': ['FBA', 'FBN', 'FBP', 'FBR', 'Merchant'],
+    # Partner table se: har run me same categories, data me jo bhi partners aayein
+    'Nub Partner': sorted({name for partners in NUB_PARTNERS.values() for name in partners.values()})
+                   + [NUB_PARTNER_DEFAULT],
+    'Partner ID': list(NUB_PARTNERS['Amazon']),  # Amazon: sheet names
+}
+
+
+# ===============================
+# SPECS
+# ===============================
+NOON_SPEC = {
+    'marketplace': 'Noon',
+    'columns': {
+        'order_timestamp': 'Date',
+        'item_nr': 'Order Number',
+        'sku': 'SKU',
+        'status': 'Status',
+        'id_partner': 'Partner Id',
+        'country_code': 'Country',
+        'partner_sku': 'Partner SKU',
+        'fulfillment_model': 'Fullfilment',
+        'offer_price': 'Sales_Price',
+    },
+    'dtypes': {'item_nr': 'str', 'sku': 'str', 'partner_sku': 'str', 'offer_price': 'float64'},
+    'date': {'column': 'Date', 'parser': 'standard', 'normalize': False},
+    'derive': {
+        'Month': ['month_name', 'Date'],
+        'Month Number': ['month', 'Date'],
+        'Year': ['year', 'Date'],
+        'Nub Partner': ['nub_partner', 'Partner Id'],
+        'Channel': ['const', 'Noon'],
+        'QTY': ['const', 1],
+        'GMV': ['mul', 'Sales_Price', 'QTY'],
+    },
+    'drop_status': {
+        'column': 'Status',
+        'values': ['Unshipped', 'Pending', 'Undelivered', 'Confirmed', 'Created', 'Exported', 'Fulfilling',
+                   'Could Not Be Delivered', 'Processing'],
+    },
+    'replace': {
+        'Country': {'SA': 'Saudi', 'AE': 'UAE'},
+        'Status': {'Shipped': 'Delivered', 'CIR': 'Cancelled'},
+        'Fullfilment': {'Fulfilled by Noon (FBN)': 'FBN', 'Fulfilled by Partner (FBP)': 'FBP'},
+    },
+    'strip': ['SKU'],
+    # (Partner ID, Partner SKU) plain Partner SKU se pehle: baad me hota to jo row composite key se milti
+    # vo plain Partner SKU tier pehle hi le leta, composite tier kabhi kuch match na karta
+    'catalog': {
+        'tiers': [
+            {'name': 'sku', 'keys': {'SKU': 'SKU'}},
+            {'name': 'partner_id+partner_sku', 'keys': {'Partner Id': 'Partner ID', 'Partner SKU': 'Partner SKU'}},
+            {'name': 'partner_sku', 'keys': {'Partner SKU': 'Partner SKU'}},
+            {'name': 'sku_normalized', 'keys': {'SKU': 'SKU'}, 'normalize': True},
+            {'name': 'partner_sku_normalized', 'keys': {'Partner SKU': 'Partner SKU'}, 'normalize': True},
+        ],
+        'fields': {'Brand Name': 'Brand', 'Category': 'Category', 'Sub-Category': 'Sub-Category',
+                   'Channel Item Name': 'Product Titles'},
+    },
+    # ✅ GMV = 0 WHERE STATUS IS CANCELLED
+    'set_where': [{'when': {'Status': 'Cancelled'}, 'set': {'GMV': 0}}],
+    'order': ['Date', 'Month', 'Month Number', 'Year', 'Order Number', 'SKU', 'Status', 'Partner Id',
+              'Nub Partner', 'Country', 'Brand Name', 'Category', 'Sub-Category', 'Channel',
+              'Channel Item Name', 'Partner SKU', 'Fullfilment', 'Sales_Price', 'QTY', 'GMV'],
+    'compact': {
+        'Month': 'category', 'Country': 'category', 'Status': 'category', 'Channel': 'category',
+        'Fullfilment': 'category', 'Nub Partner': 'category', 'Brand Name': 'category',
+        'Category': 'category', 'Sub-Category': 'category',
+        'Month Number': 'int8', 'Year': 'int16', 'QTY': 'int16', 'Sales_Price': 'float32', 'GMV': 'float32',
+    },
+}
+
+AMAZON_SPEC = {
+    'marketplace': 'Amazon',
+    'columns': {
+        'purchase-date': 'Date',
+        'amazon-order-id': 'Order Number',
+        'sku': 'SKU',
+        'item-status': 'Status',
+        'Partner ID': 'Partner ID',
+        'ship-country': 'Country',
+        'sales-channel': 'Channel',
+        'product-name': 'Channel Item Name',
+        'asin': 'Partner SKU',
+        'fulfillment-channel': 'Fulfillment',
+        'item-price': 'Sales price',
+        'quantity': 'QTY',
+    },
+    'dtypes': {'item-price': 'float64'},
+    'date': {'column': 'Date', 'parser': 'standard', 'normalize': True},
+    'fillna': {'Sales price': 0},
+    'derive': {
+        'Month': ['month_name', 'Date'],
+        'Month Number': ['month', 'Date'],
+        'Year': ['year', 'Date'],
+        'Nub Partner': ['nub_partner', 'Partner ID'],
+        'GMV': ['mul', 'Sales price', 'QTY'],
+    },
+    'drop_status': {
+        'column': 'Status',
+        'values': ['Unshipped', 'Pending', 'Undelivered', 'Confirmed', 'Created', 'Exported', 'Fulfilling'],
+    },
+    'replace': {
+        'Country': {'SA': 'Saudi', 'AE': 'UAE', 'BH': 'Bahrain', 'KW': 'Kuwait', 'OM': 'Oman'},
+        'Channel': {'Amazon.ae': 'Amazon', 'Amazon.sa': 'Amazon'},
+        'Status': {'Shipped': 'Delivered'},
+        'Fulfillment': {'Amazon': 'FBA'},
+    },
+    'strip': ['SKU'],
+    # Amazon seller SKU = catalog ka Partner SKU; na mile to catalog SKU, phir normalized.
+    # (Partner ID yahan sheet name hai, catalog ke numeric IDs se match nahi hota)
+    'catalog': {
+        'tiers': [
+            {'name': 'partner_sku', 'keys': {'SKU': 'Partner SKU'}},
+            {'name': 'sku', 'keys': {'SKU': 'SKU'}},
+            {'name': 'partner_sku_normalized', 'keys': {'SKU': 'Partner SKU'}, 'normalize': True},
+            {'name': 'sku_normalized', 'keys': {'SKU': 'SKU'}, 'normalize': True},
+        ],
+        'fields': {'Brand Name': 'Brand', 'Category': 'Category', 'Sub-Category': 'Sub-Category'},
+    },
+    # Cancelled orders ki QTY 1
+    'set_where': [{'when': {'Status': 'Cancelled'}, 'set': {'QTY': 1}}],
+    'order': ['Date', 'Month', 'Month Number', 'Year', 'Order Number', 'SKU', 'Status', 'Partner ID',
+              'Nub Partner', 'Country', 'Brand Name', 'Category', 'Sub-Category', 'Channel',
+              'Channel Item Name', 'Partner SKU', 'Fulfillment', 'Sales price', 'QTY', 'GMV'],
+    'compact': {
+        'Month': 'category', 'Country': 'category', 'Status': 'category', 'Channel': 'category',
+        'Fulfillment': 'category', 'Nub Partner': 'category', 'Partner ID': 'category',
+        'Brand Name': 'category', 'Category': 'category', 'Sub-Category': 'category',
+        'Month Number': 'int8', 'Year': 'int16', 'QTY': 'int16', 'Sales price': 'float32', 'GMV': 'float32',
+    },
+}
+
+REVIBE_SPEC = {
+    'marketplace': 'Revibe',
+    'columns': {
+        'Last Update Date': 'Date',
+        'id': 'Order Number',
+        'SKU (Old: Order Status)': 'SKU',
+        'Shipment Status': 'Status',
+        'Supplier': 'Partner Id',
+        'Country': 'Country',
+        'Category': 'Category',
+        'Condition': 'Sub-Category',
+        'Model': 'Model',
+        'Variation: Color, Storage, Condition': 'Variation: Color, Storage, Condition',
+        'Actual Cost': 'Sales Price',
+    },
+    'date': {'column': 'Date', 'parser': 'mixed', 'normalize': True},
+    'derive': {
+        'Month': ['month_name', 'Date'],
+        'Month Number': ['month', 'Date'],
+        'Year': ['year', 'Date'],
+        'Nub-Partner': ['prefix', 'Revibe ', 'Partner Id'],
+        'Brand Name': ['const', 'Apple'],
+        'Channel': ['const', 'Revibe'],
+        'Channel Item Name': ['concat', ['Model', 'Variation: Color, Storage, Condition'], ' '],
+        'Partner SKU': ['copy', 'SKU'],
+        'Fulfillment': ['const', 'FBR'],
+        'QTY': ['const', 1],
+        'GMV': ['mul', 'Sales Price', 'QTY'],
+    },
+    'replace': {
+        'Status': {'Shipped': 'Delivered', 'At quality check': 'Delivered', 'Refused delivery': 'Delivered'},
+        'Country': {'United Arab Emirates': 'UAE'},
+    },
+    'order': ['Date', 'Month', 'Month Number', 'Year', 'Order Number', 'SKU', 'Status', 'Partner Id',
+              'Nub-Partner', 'Country', 'Brand Name', 'Category', 'Sub-Category', 'Channel',
+              'Channel Item Name', 'Partner SKU', 'Fulfillment', 'Sales Price', 'QTY', 'GMV'],
+    'sort': 'Date',
+    'compact': {
+        'Month': 'category', 'Country': 'category', 'Status': 'category', 'Channel': 'category',
+        # Partner Id / Nub-Partner (suppliers) open-ended hain, koi stable set nahi: string hi rehte hain
+        'Fulfillment': 'category', 'Brand Name': 'category', 'Category': 'category', 'Sub-Category': 'category',
+        'Month Number': 'int8', 'Year': 'int16', 'QTY': 'int16', 'Sales Price': 'float32', 'GMV': 'float32',
+    },
+}
+
+# Talabat / Careem exports ka column mapping abhi available nahi hai: tab tak data jaisa hai
+# waisa rehta hai, sirf Channel tag lagta hai. Sample export milne par 'columns' / 'order' bharo.
+TALABAT_SPEC = {
+    'marketplace': 'Talabat',
+    'columns': None,
+    'derive': {'Channel': ['const', 'Talabat']},
+}
+
+CAREEM_SPEC = {
+    'marketplace': 'Careem',
+    'columns': None,
+    'derive': {'Channel': ['const', 'Careem']},
+}
+
+SPECS = {spec['marketplace']: spec for spec in (NOON_SPEC, AMAZON_SPEC, REVIBE_SPEC, TALABAT_SPEC, CAREEM_SPEC)}
+
+# ===============================
+# CANONICAL (CONSOLIDATED) SCHEMA
+# ===============================
+# Har marketplace ke output column names alag hain; combined sales table me sab isi schema me
+CANONICAL_RENAME = {
+    'Fullfilment': 'Fulfillment',
+    'Sales_Price': 'Sales Price',
+    'Sales price': 'Sales Price',
+    'Partner Id': 'Partner ID',
+    'Nub-Partner': 'Nub Partner',
+}
+CANONICAL_DTYPES = {
+    'Date': 'datetime64[us]',
+    'Month': 'string',
+    'Month Number': 'Int8',
+    'Year': 'Int16',
+    'Order Number': 'string',
+    'SKU': 'string',
+    'Status': 'string',
+    'Partner ID': 'string',
+    'Nub Partner': 'string',
+    'Country': 'string',
+    'Brand Name': 'string',
+    'Category': 'string',
+    'Sub-Category': 'string',
+    'Channel': 'string',
+    'Channel Item Name': 'string',
+    'Partner SKU': 'string',
+    'Fulfillment': 'string',
+    'Sales Price': 'float64',
+    'QTY': 'Int64',
+    'GMV': 'float64',
+}
+CANONICAL_COLUMNS = list(CANONICAL_DTYPES)
+
+
+def load_spec(path):
+    # YAML (pyyaml chahiye) ya JSON file se spec
+    with open(path) as f:
+        if str(path).lower().endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("pyyaml is required for YAML specs (pip install pyyaml)")
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+# ===============================
+# PLAN ENGINE
+# ===============================
+def _expression(expr):
+    # Spec expression -> function(df) (assign ke liye)
+    op, args = expr[0], expr[1:]
+    if op == 'const':
+        return lambda df: args[0]
+    if op == 'copy':
+        return lambda df: df[args[0]]
+    if op == 'mul':
+        return lambda df: df[args[0]] * df[args[1]]
+    if op == 'concat':
+        cols, sep = args
+
+        def concat(df):
+            out = df[cols[0]]
+            for col in cols[1:]:
+                out = out + sep + df[col]
+            return out
+        return concat
+    if op == 'prefix':
+        return lambda df: args[0] + df[args[1]].astype(str)
+    if op == 'month_name':
+        return lambda df: df[args[0]].dt.strftime('%B')
+    if op == 'month':
+        return lambda df: df[args[0]].dt.month
+    if op == 'year':
+        return lambda df: df[args[0]].dt.year
+    raise ValueError(f"Unknown spec expression: {op}")
+
+
+def _replace(values, mapping):
+    # Categorical column: replace categories par (rows par nahi), merge hui categories codes se remap
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        return values.replace(mapping)
+    categories = values.cat.categories
+    if not len(categories):
+        return values
+    renamed = pd.Index([mapping.get(c, c) for c in categories])
+    uniques = renamed.unique()
+    codes = values.cat.codes.to_numpy()
+    codes = np.where(codes < 0, -1, uniques.get_indexer(renamed)[codes])
+    return pd.Series(pd.Categorical.from_codes(codes, uniques), index=values.index, name=values.name)
+
+
+def _compact(values, dtype):
+    # Ek column compact dtype me; category sets COMPACT_CATEGORIES + extras (sorted)
+    if dtype != 'category':
+        if values.isna().any() and np.dtype(dtype).kind in 'iu':
+            return values  # NaN wale int columns jaise hain
+        return values.astype(dtype)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        current = values.cat.categories
+        used = current[np.unique(values.cat.codes[values.cat.codes >= 0])]
+    else:
+        current = None
+        used = pd.Index(values.dropna().unique())
+    known = COMPACT_CATEGORIES.get(values.name)
+    if known is None:
+        if current is not None:
+            return values  # e.g. catalog fields: categories pehle se stable
+        return values.astype(pd.CategoricalDtype(used.sort_values()))
+    extras = used.difference(known, sort=False)
+    try:
+        extras = extras.sort_values()
+    except TypeError:
+        pass
+    return values.astype(pd.CategoricalDtype(list(known) + list(extras)))
+
+
+class CleaningPlan:
+    def __init__(self, spec):
+        unknown = set(spec) - SPEC_KEYS
+        if unknown:
+            raise ValueError(f"Unknown spec keys: {sorted(unknown)}")
+        self.spec = spec
+        self.marketplace = spec.get('marketplace')
+        self.rename = spec.get('columns')
+        # Read time projection + dtypes
+        self.usecols = list(self.rename) if self.rename else None
+        self.dtypes = spec.get('dtypes') or {}
+        self.date = spec.get('date')
+        self.fillna = spec.get('fillna', {})
+        # nub_partner cleaner ke vectorized map se aata hai; baaki expressions functions ban jaate hain
+        self.derive = {
+            col: ('nub_partner', expr[1]) if expr[0] == 'nub_partner' else _expression(expr)
+            for col, expr in spec.get('derive', {}).items()
+        }
+        self.drop_status = spec.get('drop_status')
+        # Reader pushdown ke liye (raw column, values)
+        self.status_filter = None
+        if self.drop_status:
+            raw_names = {out: raw for raw, out in (self.rename or {}).items()}
+            column = self.drop_status['column']
+            self.status_filter = (raw_names.get(column, column), list(self.drop_status['values']))
+        self.replace = spec.get('replace', {})
+        self.strip = spec.get('strip', [])
+        self.catalog = spec.get('catalog')
+        if self.catalog and 'tiers' not in self.catalog:
+            self.catalog = dict(self.catalog, tiers=[
+                {'name': self.catalog['on'], 'keys': {self.catalog['key']: self.catalog['on']}},
+            ])
+        self.set_where = spec.get('set_where', [])
+        self.order = spec.get('order')
+        self.sort = spec.get('sort')
+        self.compact = spec.get('compact', {})
+        # Compact mode me raw low-cardinality columns read time par hi category (isin / replace tez)
+        self.read_categories = {
+            raw: 'category' for raw, out in (self.rename or {}).items()
+            if self.compact.get(out) == 'category' and out not in self.strip and out != (self.date or {}).get('column')
+        }
+
+    def __reduce__(self):
+        # Process pool workers ko spec bhejo, wahan dobara compile (derive expressions lambdas hain)
+        return CleaningPlan, (self.spec,)
+
+    def run(self, cleaner, df):
+        # Ek chunk / poora frame clean karo; cleaner se stages, date parse, partner map, catalog
+        with cleaner.stage('select', df) as st:
+            if self.rename:
+                df = df[self.usecols].rename(columns=self.rename)
+            st.rows(df)
+
+        # Status filter sabse pehle: date parse / derived columns sirf kaam ki rows par
+        if self.drop_status:
+            with cleaner.stage('filter', df) as st:
+                df = st.rows(df[~df[self.drop_status['column']].isin(self.drop_status['values'])])
+
+        if self.date:
+            column = self.date['column']
+            if self.date.get('parser') == 'mixed':
+                cleaner.convert_date1(column, df)
+            else:
+                cleaner.convert_date(column, df)
+            if self.date.get('normalize'):
+                # Sirf date rakho (time hata ke), timezone ho to local date
+                if not pd.api.types.is_datetime64_any_dtype(df[column]):
+                    df[column] = pd.to_datetime(df[column])
+                if df[column].dt.tz is not None:
+                    df[column] = df[column].dt.tz_localize(None)
+                df[column] = df[column].dt.normalize()
+
+        with cleaner.stage('derive', df) as st:
+            assignments = {}
+            for col, value in self.fillna.items():
+                assignments[col] = df[col].fillna(value)
+            for col, fn in self.derive.items():
+                if isinstance(fn, tuple):
+                    assignments[col] = lambda d, source=fn[1]: cleaner.map_nub_partner(d[source])
+                else:
+                    assignments[col] = fn
+            df = st.rows(df.assign(**assignments))
+
+        with cleaner.stage('replace', df) as st:
+            assignments = {col: _replace(df[col], mapping) for col, mapping in self.replace.items()}
+            for col in self.strip:
+                assignments[col] = df[col].astype(str).str.strip()
+            df = st.rows(df.assign(**assignments))
+
+        if self.catalog:
+            master = cleaner.match_catalog(df, self.catalog['tiers'], compact=cleaner.compact)
+            df = df.assign(**{col: master[field] for col, field in self.catalog['fields'].items()})
+
+        for rule in self.set_where:
+            mask = pd.Series(True, index=df.index)
+            for col, value in rule['when'].items():
+                mask &= df[col] == value
+            for col, value in rule['set'].items():
+                df.loc[mask, col] = value
+
+        if self.order:
+            df = df[self.order]
+
+        if cleaner.compact and self.compact:
+            with cleaner.stage('compact', df) as st:
+                df = st.rows(df.assign(**{
+                    col: _compact(df[col], dtype) for col, dtype in self.compact.items() if col in df
+                }))
+        return df
+
+    def prefilter(self, df):
+        # Raw chunk par status filter (reader pushdown)
+        if self.status_filter is None:
+            return df
+        column, values = self.status_filter
+        return df[~df[column].isin(values)]
+
+    def combine(self, frames, compact=False):
+        # Parallel row partitions -> ek frame (partition order me). Partitions ki category sets
+        # alag hon (compact extras) to concat object deta hai; unhe poore frame par dobara compact.
+        df = pd.concat(frames)
+        if compact and self.compact:
+            df = df.assign(**{
+                col: _compact(df[col], dtype) for col, dtype in self.compact.items()
+                if col in df and dtype == 'category' and not isinstance(df[col].dtype, pd.CategoricalDtype)
+            })
+        return df
+
+    def finalize(self, df):
+        if self.sort:
+            return df.sort_values(by=self.sort, ascending=True)
+        return df
+
+
+_plans = {}
+
+
+def compile_spec(spec):
+    # Same spec object ka plan ek hi baar compile hota hai
+    key = id(spec)
+    if key not in _plans or _plans[key].spec is not spec:
+        _plans[key] = CleaningPlan(spec)
+    return _plans[key]
@@ -0,0 +1,301 @@
+# ===============================
+# BACKGROUND CLEANING JOBS (Streamlit app)
+# ===============================
+# Streamlit script thread me clean() chalane se UI freeze hota hai. Yahan jobs ek bounded
+# thread pool me chalte hain; app sirf job status poll karta hai. Sab sessions ek hi JobStore
+# share karte hain (st.cache_resource), finished jobs TTL ke baad evict.
+# Upload aur output dono memory me rehte hain (bada output SPILL_BYTES ke baad temp file me).
+# Store result cache bhi hai: same (marketplace, upload hash, catalog version, code version)
+# dobara submit ho to naya clean nahi, pehle wala job hi milta hai.
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import your_cleaning_script as ycs
+
+# Ek saath kitne cleaning jobs (baaki queue me wait karte hain)
+JOB_WORKERS = int(os.environ.get('CLEAN_JOB_WORKERS', 2))
+# Ek job ke andar kitne processes (row partitions / Amazon sheets / combined files). Default 1: app ke
+# threads se bade process pools fork nahi hote aur JOB_WORKERS hi total CPU limit rehta hai
+JOB_PROCESSES = int(os.environ.get('CLEAN_JOB_PROCESSES', 1))
+# Finished job kitni der (seconds) tak result ke saath rehta hai
+JOB_TTL = int(os.environ.get('CLEAN_JOB_TTL', 30 * 60))
+# Finished jobs (cleaned frames + outputs) ki total memory limit; zyada hone par LRU evict
+JOB_CACHE_MB = int(os.environ.get('CLEAN_JOB_CACHE_MB', 1024))
+# Isse badi uploads chunk by chunk clean hoti hain (poora cleaned frame memory me nahi banta)
+JOB_STREAM_MB = int(os.environ.get('CLEAN_JOB_STREAM_MB', 200))
+# Streamed job ke preview ke liye sirf pehli itni cleaned rows memory me
+JOB_PREVIEW_ROWS = 1000
+# Progress ke liye top-level pipeline stages (run_pipeline + save). Streamed job me read / transform /
+# write har chunk me repeat hote hain, wahan progress upload ke padhe gaye bytes se
+PIPELINE_STAGES = ['read', 'transform', 'finalize', 'save']
+
+
+class Job:
+    def __init__(self, marketplace, filename, key=None):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.marketplace = marketplace
+        self.filename = filename
+        self.state = 'queued'  # queued / running / done / failed
+        self.error = None
+        self.cleaner = None
+        self.output = None
+        self.output_format = None
+        self.output_suffix = None
+        self.output_mime = None
+        # GMV / QTY rollup (Channel, Country, Nub Partner, Brand, Category, Month)
+        self.summary = None
+        # Cleaned rows; streamed (badi upload) job me data sirf pehli JOB_PREVIEW_ROWS rows
+        self.rows = 0
+        self.streamed = False
+        self._head = None
+        self.size = 0  # upload bytes
+        self.created = time.time()
+        self.finished = None
+        # Last access (TTL / LRU isi se) aur cleaned frame + output ka size
+        self.used = self.created
+        self.nbytes = 0
+
+    @property
+    def stage(self):
+        # Abhi kaunsa stage chal raha hai (nested stages me sabse andar wala)
+        return self.cleaner.timer.current if self.cleaner is not None else None
+
+    @property
+    def progress(self):
+        if self.state == 'done':
+            return 1.0
+        if self.cleaner is None:
+            return 0.0
+        if self.streamed:
+            return min(self.cleaner.bytes_read / self.size, 0.99) if self.size else 0.0
+        done = {st.name for st in self.cleaner.timer.stages if st.depth == 0}
+        return sum(name in done for name in PIPELINE_STAGES) / len(PIPELINE_STAGES)
+
+    @property
+    def data(self):
+        if self.streamed:
+            return self._head
+        return self.cleaner.data if self.cleaner is not None else None
+
+    def preview(self, page, page_size=100):
+        # Sirf ek page ka slice (poora frame UI me kabhi nahi bhejte)
+        start = page * page_size
+        return self.data.iloc[start:start + page_size]
+
+    def run(self, data, profile=None):
+        # Cleaner upload buffer seedha padhta hai (temp input file nahi)
+        self.cleaner = ycs.CLEANERS[self.marketplace](data, profile=profile, workers=JOB_PROCESSES)
+        self.size = memoryview(data).nbytes
+        # Whole-frame sort (Revibe) chunks me nahi ho sakta: aisi plan badi upload par bhi in-memory
+        plan = self.cleaner.plan
+        try:
+            if self.size > JOB_STREAM_MB * 2**20 and not (plan is not None and plan.sort):
+                self._run_streamed()
+            else:
+                self._run_in_memory()
+        finally:
+            # Cleaner upload buffer ko pakde na rahe
+            self.cleaner.file_path = None
+
+    def _run_in_memory(self):
+        self.cleaner.clean()
+        # Kisi bhi stage ka error = job failed (warna raw / adhoora frame "cleaned" dikh jaata)
+        errors = self.cleaner.errors()
+        if errors or self.cleaner.data is None:
+            raise RuntimeError(errors[0] if errors else "Cleaning failed")
+
+        # Output (size ke hisaab se fastest format)
+        self.rows = len(self.cleaner.data)
+        self.output_format = ycs.pick_output_format(self.rows)
+        self.output_suffix, self.output_mime = ycs.OUTPUT_FORMATS[self.output_format]
+        self.output = ycs.spooled_output()
+        self.cleaner.save_data(self.output, fmt=self.output_format)
+        errors = self.cleaner.errors()
+        if errors:
+            raise RuntimeError(errors[0])
+        self.summary = ycs.GMVAggregator().add(self.cleaner.data).result()
+        self.output.seek(0, os.SEEK_END)
+        self.nbytes = int(self.cleaner.data.memory_usage(deep=True).sum()) + self.output.tell()
+
+    def _run_streamed(self):
+        # Badi upload: chunk -> clean -> output me append (clean_chunked). Summary aur preview bhi
+        # chunks se hi bante hain, isliye memory chunk size se tay hoti hai, upload size se nahi.
+        self.streamed = True
+        # Rows pehle pata nahi: xlsx nahi, parquet / csv.gz
+        self.output_format = ycs.pick_output_format(ycs.EXCEL_MAX_ROWS)
+        self.output_suffix, self.output_mime = ycs.OUTPUT_FORMATS[self.output_format]
+        self.output = ycs.spooled_output()
+        aggregator = ycs.GMVAggregator()
+        head = []
+
+        def take(chunk):
+            aggregator.add(chunk)
+            kept = sum(len(part) for part in head)
+            if kept < JOB_PREVIEW_ROWS:
+                head.append(chunk.iloc[:JOB_PREVIEW_ROWS - kept])
+
+        self.rows = self.cleaner.clean_chunked(self.output, fmt=self.output_format, on_chunk=take)
+        errors = self.cleaner.errors()
+        if errors:
+            raise RuntimeError(errors[0])
+        self._head = ycs.pd.concat(head) if head else ycs.pd.DataFrame()
+        self.summary = aggregator.result()
+        self.output.seek(0, os.SEEK_END)
+        self.nbytes = int(self._head.memory_usage(deep=True).sum()) + self.output.tell()
+
+    def read_output(self):
+        self.output.seek(0)
+        return self.output.read()
+
+    def cleanup(self):
+        # Spilled output ki temp file close par delete ho jaati hai
+        if self.output is not None:
+            self.output.close()
+            self.output = None
+        self.cleaner = None
+
+
+class ConsolidateJob(Job):
+    # Kai uploads (alag marketplaces) -> ek canonical, Channel/Year/Month partitioned Parquet dataset (zip)
+    def __init__(self, files, key=None):
+        super().__init__('Combined', f"{len(files)} files", key)
+        self.total = len(files)
+        self.done = 0
+        self.manifest = None
+
+    @property
+    def stage(self):
+        return f"{self.done}/{self.total} files"
+
+    @property
+    def progress(self):
+        return 1.0 if self.state == 'done' else self.done / self.total
+
+    @property
+    def data(self):
+        # Preview: har partition me kitni rows
+        return self.manifest
+
+    def run(self, files, workers=None):
+        # files: [(name, data, marketplace)]; dataset temp dir me, phir zip karke memory / spill
+        root = tempfile.mkdtemp(prefix='consolidated_')
+        try:
+            dataset = os.path.join(root, 'sales')
+            self.manifest = ycs.consolidate([(data, marketplace) for _, data, marketplace in files], dataset,
+                                            workers=workers or JOB_PROCESSES, on_done=self._file_done)
+            # Summary dataset par hi streaming pass se (poora data memory me nahi aata)
+            self.summary = ycs.summarize([dataset])
+            self.output_format = 'parquet-dataset'
+            self.output_suffix, self.output_mime = '.zip', 'application/zip'
+            self.output = ycs.spooled_output()
+            # Parquet pehle se compressed hai: zip sirf store karta hai
+            with zipfile.ZipFile(self.output, 'w', zipfile.ZIP_STORED) as archive:
+                for folder, _, names in os.walk(dataset):
+                    for name in sorted(names):
+                        path = os.path.join(folder, name)
+                        archive.write(path, os.path.relpath(path, root))
+            self.output.seek(0, os.SEEK_END)
+            self.nbytes = self.output.tell()
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+    def _file_done(self, index, marketplace):
+        self.done += 1
+
+
+def result_key(marketplace, data, profile=None):
+    # Cached result kab valid hai: same upload, same catalog, same cleaning code
+    return (marketplace, hashlib.md5(data).hexdigest(), ycs.master_catalog.refresh().version,
+            ycs.code_version(), profile)
+
+
+class JobStore:
+    def __init__(self, workers=JOB_WORKERS, ttl=JOB_TTL, max_mb=JOB_CACHE_MB):
+        self.ttl = ttl
+        self.max_bytes = max_mb * 2**20
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='clean-job')
+        self._jobs = {}
+        self._results = {}  # result_key -> job id
+        self._lock = threading.Lock()
+
+    def submit(self, marketplace, data, filename, profile=None):
+        # data: upload ke bytes / memoryview (session ka UploadedFile thread me share nahi karte)
+        self.evict()
+        key = result_key(marketplace, data, profile)
+        with self._lock:
+            cached = self._jobs.get(self._results.get(key))
+            if cached is not None and cached.state != 'failed':
+                # Same file pehle se clean ho chuki / ho rahi hai
+                cached.used = time.time()
+                return cached.id
+            job = Job(marketplace, filename, key)
+            self._jobs[job.id] = job
+            self._results[key] = job.id
+        self._pool.submit(self._run, job, data, profile)
+        return job.id
+
+    def submit_consolidated(self, files, workers=None):
+        # files: [(name, data, marketplace)] -> ek combined dataset job
+        self.evict()
+        digest = hashlib.md5()
+        for _, data, marketplace in files:
+            digest.update(marketplace.encode())
+            digest.update(hashlib.md5(data).digest())
+        key = ('Combined', digest.hexdigest(), ycs.master_catalog.refresh().version, ycs.code_version(), None)
+        with self._lock:
+            cached = self._jobs.get(self._results.get(key))
+            if cached is not None and cached.state != 'failed':
+                cached.used = time.time()
+                return cached.id
+            job = ConsolidateJob(files, key)
+            self._jobs[job.id] = job
+            self._results[key] = job.id
+        self._pool.submit(self._run, job, files, workers)
+        return job.id
+
+    def get(self, job_id):
+        self.evict()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.used = time.time()
+            return job
+
+    def evict(self):
+        # TTL (last access se) + memory limit: least recently used finished jobs pehle jaate hain
+        now = time.time()
+        with self._lock:
+            finished = sorted((job for job in self._jobs.values() if job.finished), key=lambda job: job.used)
+            expired = [job for job in finished if now - job.used > self.ttl]
+            total = sum(job.nbytes for job in finished if job not in expired)
+            for job in finished:
+                if total <= self.max_bytes:
+                    break
+                if job not in expired:
+                    expired.append(job)
+                    total -= job.nbytes
+            for job in expired:
+                del self._jobs[job.id]
+                if self._results.get(job.key) == job.id:
+                    del self._results[job.key]
+        for job in expired:
+            job.cleanup()
+
+    def _run(self, job, *args):
+        job.state = 'running'
+        try:
+            job.run(*args)
+            job.state = 'done'
+        except Exception as e:
+            job.error = str(e)
+            job.state = 'failed'
+        finally:
+            job.finished = job.used = time.time()
@@ -0,0 +1,32 @@
+import io
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Repo ke top-level modules (your_cleaning_script, jobs, benchmark) import ho sakein
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import benchmark  # noqa: E402
+import your_cleaning_script as ycs  # noqa: E402
+
+FRAMES = {'Noon': benchmark.noon_frame, 'Amazon': benchmark.amazon_frame, 'Revibe': benchmark.revibe_frame}
+
+
+def synthetic_export(marketplace, rows=300, seed=0):
+    # benchmark.py ke generators se chhota export, upload jaisa bytes me
+    frame = FRAMES[marketplace](rows, np.random.default_rng(seed), ycs.master_catalog.refresh().data)
+    buffer = io.BytesIO()
+    if marketplace == 'Amazon':
+        benchmark.write_amazon_xlsx(frame, buffer)
+    else:
+        frame.to_csv(buffer, index=False)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def upload():
+    # upload('Noon') -> memoryview, jaise Streamlit ka UploadedFile.getbuffer()
+    return lambda marketplace, rows=300, seed=0: memoryview(synthetic_export(marketplace, rows, seed))
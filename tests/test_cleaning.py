@@ -0,0 +1,178 @@
+import io
+import os
+
+import pandas as pd
+import pytest
+from dateutil import parser
+from pandas.testing import assert_frame_equal
+
+import your_cleaning_script as ycs
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+# fixtures/<marketplace>: benchmark.py generators se 200 rows (seed 7).
+# fixtures/expected_<marketplace>.csv: wahi files spec engine se pehle wale cleaners (hand-written
+# NoonCleaner / AmazonCleaner / RevibeCleaner pipelines) se clean ki hui.
+INPUTS = {'Noon': 'noon.csv', 'Amazon': 'amazon.xlsx', 'Revibe': 'revibe.csv'}
+
+
+def fixture(name):
+    return os.path.join(FIXTURES, name)
+
+
+def as_csv(df):
+    # Dono side CSV round trip: dtypes nahi, values compare hoti hain (expected file CSV hai)
+    return pd.read_csv(io.StringIO(df.to_csv(index=False)))
+
+
+@pytest.mark.parametrize('marketplace', sorted(INPUTS))
+def test_output_matches_pre_spec_cleaners(marketplace):
+    cleaner = ycs.CLEANERS[marketplace](fixture(INPUTS[marketplace]), workers=1)
+    cleaner.clean()
+    assert cleaner.errors() == []
+    expected = pd.read_csv(fixture(f"expected_{marketplace.lower()}.csv"))
+    assert_frame_equal(as_csv(cleaner.data), expected)
+
+
+@pytest.mark.parametrize('marketplace', sorted(INPUTS))
+@pytest.mark.parametrize('compact', [False, True])
+def test_partitioned_transform_matches_serial(marketplace, compact, monkeypatch):
+    serial = ycs.CLEANERS[marketplace](fixture(INPUTS[marketplace]), workers=1, compact=compact)
+    serial.clean()
+    monkeypatch.setattr(ycs.BaseCleaner, 'PARTITION_MIN_ROWS', 40)
+    parallel = ycs.CLEANERS[marketplace](fixture(INPUTS[marketplace]), workers=3, compact=compact)
+    parallel.clean()
+    assert_frame_equal(parallel.data, serial.data)
+    assert parallel.match_stats == serial.match_stats
+    assert parallel.date_stats == serial.date_stats
+
+
+def test_chunked_clean_matches_in_memory(tmp_path):
+    # Noon: koi whole-frame sort nahi, isliye chunked output same order me
+    cleaner = ycs.NoonCleaner(fixture('noon.csv'), workers=1)
+    cleaner.clean()
+    output = tmp_path / 'noon.csv'
+    rows = ycs.NoonCleaner(fixture('noon.csv')).clean_chunked(str(output), chunksize=30)
+    assert rows == len(cleaner.data)
+    assert_frame_equal(pd.read_csv(output), as_csv(cleaner.data))
+
+
+def test_chunked_parquet_with_blank_leading_column(tmp_path):
+    # Pehle chunks me fulfillment_model khali: parquet schema use double nahi maanna chahiye
+    source = tmp_path / 'noon.csv'
+    raw = pd.read_csv(fixture('noon.csv'))
+    raw.loc[:59, 'fulfillment_model'] = None
+    raw.to_csv(source, index=False)
+    cleaner = ycs.NoonCleaner(str(source), workers=1)
+    cleaner.clean()
+    output = tmp_path / 'noon.parquet'
+    chunked = ycs.NoonCleaner(str(source))
+    rows = chunked.clean_chunked(str(output), chunksize=50)
+    assert chunked.errors() == []
+    assert rows == len(cleaner.data)
+    assert_frame_equal(pd.read_parquet(output), cleaner.data.reset_index(drop=True))
+
+
+def test_mixed_dates_match_dateutil_dayfirst():
+    values = pd.Series([
+        '05/01/2024 10:30', '05-01-2024', '2024-05-01 08:00:00', '2024-13-01 08:00:00', '01/13/2024 09:15 PM',
+        '5 Jan 2024', 'Jan 5, 2024', None, '05/01/2024 10:30', '2024-01-05T07:45:00',
+    ])
+    parsed, stats = ycs.parse_mixed_dates(values, dayfirst=True)
+    for value, result in zip(values, parsed):
+        if pd.isna(value):
+            assert pd.isna(result)
+        else:
+            assert result == parser.parse(value, dayfirst=True), value
+    assert stats['null'] == 1
+    assert sum(stats.values()) == len(values)
+
+
+def test_nub_partner_mapping():
+    noon = ycs.NoonCleaner(None)
+    ids = pd.Series([46272, '181587', 99999, None])
+    assert noon.map_nub_partner(ids).tolist() == ['Nub-Partner 46272', 'Nub-Partner 181587', 'Null', 'Null']
+
+    amazon = ycs.AmazonCleaner(None)
+    sheets = pd.Series(['Wishcare', '100 MPH', '100_Miles', 'Other'])
+    assert amazon.map_nub_partner(sheets).tolist() == [
+        'Nub-Partner Wishcare', 'Nub-Partner 100 MPH', 'Nub-Partner 100_Miles', 'Null']
+
+def test_summary_without_channel_dimension(tmp_path):
+    # Cancel rules Channel / Status par chalte hain, chahe ve dimensions me na hon
+    paths = []
+    for marketplace in ('Noon', 'Amazon'):
+        cleaner = ycs.CLEANERS[marketplace](fixture(INPUTS[marketplace]), workers=1)
+        cleaner.clean()
+        paths.append(str(tmp_path / f"{marketplace}.parquet"))
+        cleaner.save_data(paths[-1])
+    full = ycs.summarize(paths)
+    summary = ycs.summarize(paths, dimensions=['Country', 'Year'])
+    assert list(summary.columns) == ['Country', 'Year', 'GMV', 'QTY', 'Orders']
+    expected = full.groupby(['Country', 'Year'], dropna=False)[['GMV', 'QTY', 'Orders']].sum().reset_index()
+    assert_frame_equal(summary.sort_values(['Country', 'Year'], ignore_index=True), expected, check_dtype=False)
+
+
+def test_incremental_clean_reuses_cache(tmp_path):
+    cache = ycs.ResultCache(str(tmp_path))
+    expected = ycs.NoonCleaner(fixture('noon.csv'), workers=1)
+    expected.clean()
+    runs = []
+    for _ in range(2):
+        cleaner = ycs.NoonCleaner(fixture('noon.csv'), workers=1)
+        cleaner.clean_incremental(cache)
+        assert cleaner.errors() == []
+        assert_frame_equal(as_csv(cleaner.data), as_csv(expected.data))
+        runs.append(cleaner.cache_stats)
+    # Dusre run me kuch bhi dobara clean nahi hota
+    assert runs[1] == {'cached': runs[0]['cleaned'], 'cleaned': 0}
+
+
+def cache_entries(orders, used, version='v1'):
+    index = pd.MultiIndex.from_arrays([orders, [0] * len(orders)], names=ycs.ResultCache.KEY_COLUMNS)
+    return pd.DataFrame({'SKU': orders, '__version': version, '__used': used}, index=index)
+
+
+def test_cache_store_merges_parallel_runs(tmp_path):
+    # Do runs ne khali cache load kiya, phir dono store karte hain: dono ke rows bachne chahiye
+    cache = ycs.ResultCache(str(tmp_path))
+    cache.store('Noon', {'kept': cache_entries(['a', 'b'], [1, 1])}, 'v1')
+    cache.store('Noon', {'kept': cache_entries(['b', 'c'], [2, 2])}, 'v1')
+    kept = cache.load('Noon', 'v1')['kept']
+    assert sorted(kept.index.get_level_values('__order')) == ['a', 'b', 'c']
+    assert kept.loc[('b', 0), '__used'] == 2
+    assert cache.load('Noon', 'v2')['kept'].empty
+    assert not os.path.exists(tmp_path / 'Noon.lock')
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = ycs.ResultCache(str(tmp_path), max_rows=3)
+    cache.store('Noon', {'kept': cache_entries(['a', 'b', 'c'], [1, 2, 3]),
+                         'dropped': cache_entries(['d', 'e'], [5, 0])}, 'v1')
+    entries = cache.load('Noon', 'v1')
+    assert sorted(entries['kept'].index.get_level_values('__order')) == ['b', 'c']
+    assert list(entries['dropped'].index.get_level_values('__order')) == ['d']
+
+
+def test_catalog_match_tiers():
+    catalog = ycs.master_catalog.refresh().data
+    # Sirf unique keys (raw aur normalized dono) wale rows, jinme letters hon (lower-case alag dikhe)
+    unique = pd.Series(True, index=catalog.index)
+    for col in ('SKU', 'Partner SKU'):
+        normalized = catalog[col].str.upper()
+        unique &= ~normalized.duplicated(keep=False) & catalog[col].str.contains('[A-Za-z]')
+    rows = catalog[unique].iloc[:5]
+    frame = pd.DataFrame({
+        'SKU': [rows['SKU'].iloc[0], 'NO-SUCH-SKU', 'NO-SUCH-SKU', f"  {rows['SKU'].iloc[3].lower()} ",
+                'NO-SUCH-SKU', 'NO-SUCH-SKU'],
+        'Partner Id': [0, rows['Partner ID'].iloc[1], 0, 0, 0, 0],
+        'Partner SKU': ['', rows['Partner SKU'].iloc[1], rows['Partner SKU'].iloc[2], '',
+                        f" {rows['Partner SKU'].iloc[4].lower()}  ", 'NO-SUCH-PARTNER-SKU'],
+    }, index=[10, 11, 12, 13, 14, 15])
+    found, stats = ycs.master_catalog.match(frame, ycs.SPECS['Noon']['catalog']['tiers'], compact=False)
+
+    assert stats == {'sku': 1, 'partner_id+partner_sku': 1, 'partner_sku': 1, 'sku_normalized': 1,
+                     'partner_sku_normalized': 1, 'unmatched': 1}
+    assert list(found.index) == list(frame.index)
+    expected = rows[['Brand', 'Category']].reset_index(drop=True)
+    assert_frame_equal(found[['Brand', 'Category']].iloc[:5].reset_index(drop=True), expected)
+    assert found.iloc[5].isna().all()
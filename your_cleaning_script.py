@@ -1,379 +1,1706 @@
-import pandas as pd
-import numpy as np
-from dateutil import parser
-master_df = pd.read_csv('product.csv')
+import io
+import os
+import tempfile
+import time
+import calendar
+import hashlib
+import contextlib
+import itertools
+import json
+import operator
+import pickle
+import threading
+from cleaning_spec import SPECS, CANONICAL_COLUMNS, CANONICAL_DTYPES, CANONICAL_RENAME, compile_spec, load_spec
+from cleaning_spec import LazyModule, NUB_PARTNERS, NUB_PARTNER_DEFAULT
+
+# Heavy libraries pehle use par import hote hain (fast import / cold start)
+pd = LazyModule('pandas')
+np = LazyModule('numpy')
+parser = LazyModule('dateutil.parser')
+
+# product.csv: CLEANING_CATALOG env se, warna is script ke folder me (CWD se independent)
+CATALOG_PATH = (os.path.abspath(os.environ['CLEANING_CATALOG']) if os.environ.get('CLEANING_CATALOG')
+                else os.path.join(os.path.dirname(os.path.abspath(__file__)), 'product.csv'))
+# Catalog ka binary snapshot (catalog ke saath '<path>.snapshot.pkl'); CLEANING_CATALOG_SNAPSHOT=0 se band
+CATALOG_SNAPSHOT = os.environ.get('CLEANING_CATALOG_SNAPSHOT', '1') != '0'
+# Snapshot layout (data / indexes) badle to ye number badhao, purane snapshots ignore ho jayenge
+CATALOG_SNAPSHOT_FORMAT = 1
+
+
+# ===============================
+# SKU MASTER CATALOG (product.csv)
+# ===============================
+def catalog_keys(values, normalize=False):
+    # Join keys ek format me: str, trimmed; normalize=True par upper-case aur saara whitespace hata ke.
+    # Float IDs (NaN wale int columns) '46272.0' na banen isliye pehle Int64.
+    if pd.api.types.is_float_dtype(values):
+        finite = values.dropna()
+        if (finite == finite.round()).all():
+            values = values.astype('Int64')
+    keys = values.astype(str).str.strip()
+    if normalize:
+        keys = keys.str.upper().str.replace(r'\s+', '', regex=True)
+    return keys
+
+
+class MasterCatalog:
+    # Master se ye columns fill hote hain
+    FIELDS = ['Brand', 'Category', 'Sub-Category', 'Product Titles']
+    # In keys par load time par hi hash index bana lete hain (baaki pehle use par)
+    KEYS = ['SKU', 'Partner SKU']
+    # Compact mode me ye fields category (poore catalog ki sorted categories, version ke saath stable)
+    CATEGORY_FIELDS = ['Brand', 'Category', 'Sub-Category']
+
+    def __init__(self, path=None, snapshot=CATALOG_SNAPSHOT):
+        self.path = path or CATALOG_PATH
+        # Parsed catalog + hash indexes ka pickle: cold start par CSV parse / index build nahi
+        self.snapshot_path = self.path + '.snapshot.pkl' if snapshot else None
+        self.data = None
+        self.version = None
+        self._stamp = None
+        # (catalog columns, normalize) -> Series(key -> catalog row number)
+        self._indexes = {}
+        self._fields = {}
+        # App ke job threads ek hi catalog share karte hain: reload aur lazy index / fields build ek saath nahi
+        self._lock = threading.RLock()
+
+    def __getstate__(self):
+        # Lock pickle nahi hota (spawn workers ko catalog state bhejte waqt)
+        state = dict(self.__dict__)
+        state.pop('_lock', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def refresh(self):
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self):
+        # Pehli baar use pe load, baad me sirf file change hone par reload
+        stat = os.stat(self.path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if self.data is not None and stamp == self._stamp:
+            return self
+        if self.data is None and self._load_snapshot(stamp=stamp):
+            return self
+
+        with open(self.path, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.md5(raw).hexdigest()
+        self._stamp = stamp
+        if self.data is not None and digest == self.version:
+            # Sirf mtime badla hai (touch), content same hai
+            return self
+        if self.data is None and self._load_snapshot(digest=digest):
+            # Snapshot content same hai, sirf naya stamp likh do
+            self._stamp = stamp
+            self._save_snapshot()
+            return self
+
+        data = pd.read_csv(io.BytesIO(raw))
+        # Keys ek hi baar normalize karo
+        for key in self.KEYS:
+            data[key] = data[key].astype(str).str.strip()
+        data = data.reset_index(drop=True)
+
+        self.data = data
+        self.version = digest
+        self._indexes = {}
+        self._fields = {}
+        for key in self.KEYS:
+            self._build_index((key,), False)
+        self._save_snapshot()
+        print(f"Master Catalog Loaded: {data.shape}")
+        return self
+
+    def _load_snapshot(self, stamp=None, digest=None):
+        # Snapshot tabhi valid jab format + pandas version match kare aur file stamp (ya md5) same ho
+        if self.snapshot_path is None or not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            with open(self.snapshot_path, 'rb') as f:
+                snapshot = pickle.load(f)
+        except Exception as e:
+            print(f"Catalog snapshot unreadable, rebuilding: {e}")
+            return False
+        if snapshot.get('format') != CATALOG_SNAPSHOT_FORMAT or snapshot.get('pandas') != pd.__version__:
+            return False
+        if stamp is not None and snapshot['stamp'] != stamp:
+            return False
+        if digest is not None and snapshot['version'] != digest:
+            return False
+
+        self.data = snapshot['data']
+        self.version = snapshot['version']
+        self._stamp = snapshot['stamp']
+        self._indexes = snapshot['indexes']
+        self._fields = {}
+        print(f"Master Catalog Loaded (snapshot): {self.data.shape}")
+        return True
+
+    def _save_snapshot(self):
+        # Temp file + rename (dusra process aadha likha snapshot na padhe); likh na paaye to bas skip
+        if self.snapshot_path is None:
+            return
+        snapshot = {'format': CATALOG_SNAPSHOT_FORMAT, 'pandas': pd.__version__, 'stamp': self._stamp,
+                    'version': self.version, 'data': self.data, 'indexes': self._indexes}
+        try:
+            fd, tmp = tempfile.mkstemp(prefix='.catalog_', dir=os.path.dirname(self.snapshot_path))
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, self.snapshot_path)
+        except OSError as e:
+            print(f"Catalog snapshot not written: {e}")
+
+    def _build_index(self, columns, normalize):
+        # Duplicate keys hata ke index banao (pehla record rakhte hain); value = catalog row number
+        parts = [catalog_keys(self.data[col], normalize) for col in columns]
+        if len(parts) == 1:
+            keys = pd.Index(parts[0])
+        else:
+            keys = pd.MultiIndex.from_arrays(parts)
+        rows = pd.Series(np.arange(len(self.data)), index=keys)
+        self._indexes[columns, normalize] = rows[~keys.duplicated()]
+        return self._indexes[columns, normalize]
+
+    def index(self, columns, normalize=False):
+        columns = (columns,) if isinstance(columns, str) else tuple(columns)
+        with self._lock:
+            self.refresh()
+            if (columns, normalize) not in self._indexes:
+                return self._build_index(columns, normalize)
+            return self._indexes[columns, normalize]
+
+    def fields(self, compact=False):
+        # Catalog row number -> FIELDS (compact: category fields)
+        with self._lock:
+            self.refresh()
+            if compact not in self._fields:
+                fields = self.data[self.FIELDS]
+                if compact:
+                    fields = fields.astype({field: 'category' for field in self.CATEGORY_FIELDS})
+                self._fields[compact] = fields
+            return self._fields[compact]
+
+    def match(self, frame, tiers, compact=False):
+        # Fallback chain: har tier sirf abhi tak unmatched rows par ek vectorized hash lookup.
+        # tiers: [{'name', 'keys': {data column: catalog column}, 'normalize': bool}]
+        # Returns (FIELDS frame index par aligned, har tier ki hit count + 'unmatched')
+        rows = np.full(len(frame), -1, dtype=np.int64)
+        remaining = np.arange(len(frame))
+        stats = {}
+        for tier in tiers:
+            if not len(remaining):
+                stats[tier['name']] = 0
+                continue
+            normalize = tier.get('normalize', False)
+            index = self.index(list(tier['keys'].values()), normalize)
+            parts = [catalog_keys(frame[col].iloc[remaining], normalize).to_numpy() for col in tier['keys']]
+            keys = parts[0] if len(parts) == 1 else pd.MultiIndex.from_arrays(parts)
+            pos = index.index.get_indexer(keys)
+            hit = pos >= 0
+            rows[remaining[hit]] = index.to_numpy()[pos[hit]]
+            remaining = remaining[~hit]
+            stats[tier['name']] = int(hit.sum())
+        stats['unmatched'] = len(remaining)
+        found = self.fields(compact).reindex(rows)
+        found.index = frame.index
+        return found, stats
+
+    def lookup(self, keys, on='SKU', compact=False):
+        # keys ke har row ke liye master ki FIELDS, keys ke index par aligned (ek exact tier)
+        found, _ = self.match(keys.to_frame('key'), [{'name': on, 'keys': {'key': on}}], compact)
+        return found
+
+
+master_catalog = MasterCatalog()
+
+_code_version = None
+
+
+def code_version():
+    # Cleaning code + specs ka hash: code badalne par purane cached results invalid
+    global _code_version
+    if _code_version is None:
+        import cleaning_spec
+        digest = hashlib.md5()
+        for path in (__file__, cleaning_spec.__file__):
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        _code_version = digest.hexdigest()
+    return _code_version
+
+# ===============================
+# NUB PARTNER MAPPING (per marketplace)
+# ===============================
+# Partner table (NUB_PARTNERS) cleaning_spec.py me hai: compact mode ki categories bhi wahi se
+
+_nub_partner_tables = {}
+
+
+def nub_partner_table(marketplace):
+    # int aur str partner IDs dono match hon (46272 == '46272')
+    if marketplace not in _nub_partner_tables:
+        table = {}
+        for pid, name in NUB_PARTNERS.get(marketplace, {}).items():
+            table[pid] = name
+            table[str(pid)] = name
+        _nub_partner_tables[marketplace] = table
+    return _nub_partner_tables[marketplace]
+
+
+# ===============================
+# MIXED-FORMAT DATE PARSING ENGINE
+# ===============================
+# dayfirst=True wale dateutil jaisa order: pehle day-first formats, phir month-first.
+# Dhyan do: dateutil dayfirst me '2024-01-05' ko 1 May padhta hai, isliye %Y-%d-%m pehle.
+DATE_FORMATS = [
+    '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d/%m/%Y %I:%M %p', '%d/%m/%Y',
+    '%d-%m-%Y %H:%M:%S', '%d-%m-%Y %H:%M', '%d-%m-%Y',
+    '%Y-%d-%m %H:%M:%S', '%Y-%d-%m %H:%M', '%Y-%d-%mT%H:%M:%S', '%Y-%d-%m',
+    '%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d',
+    '%m/%d/%Y %H:%M:%S', '%m/%d/%Y %H:%M', '%m/%d/%Y %I:%M %p', '%m/%d/%Y',
+    '%d %b %Y', '%d %B %Y', '%b %d, %Y', '%B %d, %Y',
+]
+# Har format group me itne samples dateutil se cross-check hote hain
+DATE_VERIFY_SAMPLES = 3
+# dateutil fallback results ka memo (chunks ke beech bhi kaam aata hai)
+DATE_MEMO_LIMIT = 100_000
+_date_memo = {}
+
+
+def _dateutil_parse(value, dayfirst):
+    # App ke job threads memo share karte hain: dusra thread beech me clear() kar sakta hai,
+    # isliye check ke baad memo se dobara nahi padhte
+    key = (value, dayfirst)
+    parsed = _date_memo.get(key)
+    if parsed is None:
+        if len(_date_memo) >= DATE_MEMO_LIMIT:
+            _date_memo.clear()
+        _date_memo[key] = parsed = parser.parse(value, dayfirst=dayfirst)
+    return parsed
+
+
+def parse_mixed_dates(values, dayfirst=True):
+    # Har distinct string ek hi baar parse hoti hai; format groups vectorized
+    # pd.to_datetime(format=...) se, bache hue dateutil se.
+    # Returns (parsed Series, {path: row count}).
+    stats = {}
+    present = values[values.notnull()].astype(str)
+    if len(present) < len(values):
+        stats['null'] = len(values) - len(present)
+    counts = present.value_counts(sort=False)
+    remaining = pd.Index(counts.index)
+    parsed = {}
+
+    for fmt in DATE_FORMATS:
+        if remaining.empty:
+            break
+        result = pd.to_datetime(remaining, format=fmt, errors='coerce')
+        ok = ~result.isna()
+        if not ok.any():
+            continue
+        matched, matched_values = remaining[ok], result[ok]
+        # Sample check: format dateutil(dayfirst) jaisa hi result de raha hai?
+        sample = range(min(DATE_VERIFY_SAMPLES, len(matched)))
+        if any(_dateutil_parse(matched[i], dayfirst) != matched_values[i] for i in sample):
+            continue
+        parsed.update(zip(matched, matched_values))
+        stats[fmt] = int(counts[matched].sum())
+        remaining = remaining[~ok]
+
+    if not remaining.empty:
+        for value in remaining:
+            parsed[value] = _dateutil_parse(value, dayfirst)
+        stats['dateutil'] = int(counts[remaining].sum())
+
+    lookup = pd.Series(list(parsed.values()), index=list(parsed.keys()), dtype=object)
+    try:
+        lookup = pd.to_datetime(lookup)
+    except (ValueError, TypeError):
+        pass  # mixed timezones - object hi rehne do
+    return values.astype(object).where(values.notnull()).map(lookup), stats
+
+
+# ===============================
+# OUTPUT FORMATS
+# ===============================
+# format -> (file suffix, download mime type)
+OUTPUT_FORMATS = {
+    'xlsx': ('.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'xlsx-stream': ('.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'csv': ('.csv', 'text/csv'),
+    'csv.gz': ('.csv.gz', 'application/gzip'),
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+}
+# Excel sheet me header ke saath max 1,048,576 rows
+EXCEL_MAX_ROWS = 1_048_576
+# Isse badi xlsx files openpyxl write-only (streaming) mode me likhte hain
+XLSX_STREAM_ROWS = 50_000
+# App download ke liye: isse chhota output xlsx, bada parquet / csv.gz
+XLSX_DOWNLOAD_ROWS = 100_000
+
+
+def output_format(output_file, fmt=None):
+    # Explicit fmt, warna extension se format decide karo
+    if fmt is not None:
+        if fmt not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {fmt}")
+        return fmt
+    name = str(getattr(output_file, 'name', output_file)).lower()
+    if name.endswith('.parquet') or name.endswith('.pq'):
+        return 'parquet'
+    if name.endswith('.csv.gz') or name.endswith('.gz'):
+        return 'csv.gz'
+    if name.endswith('.csv'):
+        return 'csv'
+    return 'xlsx'
+
+
+def pick_output_format(n_rows):
+    # Output size ke hisaab se sabse fast format
+    if n_rows <= XLSX_DOWNLOAD_ROWS:
+        return 'xlsx'
+    try:
+        import pyarrow  # noqa: F401
+        return 'parquet'
+    except ImportError:
+        return 'csv.gz'
+
+
+# ===============================
+# IN-MEMORY INPUT / OUTPUT (uploads)
+# ===============================
+# Output itne bytes tak memory me rehta hai, usse bada hone par temp file me spill
+SPILL_BYTES = 256 * 2**20
+
+
+class _BufferReader(io.RawIOBase):
+    # bytes / memoryview par read-only seekable file: poora buffer copy nahi hota,
+    # sirf jo piece padha ja raha hai wahi
+    def __init__(self, buffer):
+        self._view = memoryview(buffer).cast('B')
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def readinto(self, b):
+        piece = self._view[self._pos:self._pos + len(b)]
+        b[:len(piece)] = piece
+        self._pos += len(piece)
+        return len(piece)
+
+
+def is_buffer(source):
+    return isinstance(source, (bytes, bytearray, memoryview))
+
+
+def open_source(source):
+    # Path / bytes / memoryview / file-like -> shuru se readable (har read ke liye naya)
+    if is_buffer(source):
+        return io.BufferedReader(_BufferReader(source))
+    if hasattr(source, 'read'):
+        source.seek(0)
+    return source
+
+
+def source_bytes(source):
+    # Poora input bytes me (process pool ko bhejne ke liye); buffer ho to wahi
+    if is_buffer(source):
+        return source
+    if hasattr(source, 'read'):
+        source.seek(0)
+        return source.read()
+    with open(source, 'rb') as f:
+        return f.read()
+
+
+def describe_target(target):
+    # Logs / reports ke liye path, in-memory ho to '<memory>'
+    if isinstance(target, (str, os.PathLike)):
+        return str(target)
+    name = getattr(target, 'name', None)
+    return name if isinstance(name, str) else '<memory>'
+
+
+def spooled_output(max_size=SPILL_BYTES):
+    # save_data ke liye in-memory output; max_size se bada hote hi disk par spill
+    return tempfile.SpooledTemporaryFile(max_size=max_size)
+
+
+def _excel_floats(df):
+    # Compact mode ke float32 prices Excel me 148.600006 na dikhen: shortest repr se float64
+    float32 = df.columns[df.dtypes == np.float32]
+    if len(float32):
+        df = df.assign(**{col: df[col].astype(str).astype('float64') for col in float32})
+    return df
+
+
+def _xlsx_rows(df):
+    # openpyxl ke liye NaN/NaT -> None
+    df = _excel_floats(df)
+    for row in df.astype(object).where(df.notna(), None).itertuples(index=False, name=None):
+        yield row
+
+
+def write_xlsx_stream(df, output_file):
+    # openpyxl write-only workbook: rows seedha stream hoti hain, poori sheet memory me nahi
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(list(df.columns))
+    for row in _xlsx_rows(df):
+        ws.append(row)
+    wb.save(output_file)
+
+
+# ===============================
+# CHUNK WRITER (streaming output)
+# ===============================
+class ChunkWriter:
+    # Cleaned chunks ko output me append karta hai (csv / csv.gz / parquet / xlsx-stream).
+    # dtypes: {column: dtype} - parquet schema me un columns ka type jo pehle chunk me poore khali hain
+    # (warna pandas unhe double / null maan leta hai aur agle chunk ki values fail hoti hain)
+    def __init__(self, output_file, fmt=None, dtypes=None):
+        self.output_file = output_file
+        self.fmt = output_format(output_file, fmt)
+        self.dtypes = dtypes or {}
+        self.rows = 0
+        self._handle = None
+        self._sheet = None
+        self._schema = None
+
+    def write(self, df):
+        if self.fmt in ('xlsx', 'xlsx-stream') and self.rows + len(df) >= EXCEL_MAX_ROWS:
+            raise ValueError(f"Output exceeds Excel limit ({EXCEL_MAX_ROWS - 1} rows); use csv or parquet")
+
+        first = self._handle is None
+        if first:
+            self._open(df)
+
+        if self.fmt == 'parquet':
+            import pyarrow as pa
+            # cast: jo column pehle chunk me khali tha (schema me hinted type), uski values yahan convert
+            self._handle.write_table(pa.Table.from_pandas(df, preserve_index=False).cast(self._schema))
+        elif self.fmt in ('xlsx', 'xlsx-stream'):
+            for row in _xlsx_rows(df):
+                self._sheet.append(row)
+        else:
+            df.to_csv(self._handle, index=False, header=first)
+        self.rows += len(df)
+
+    def _open(self, df):
+        if self.fmt == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            schema = pa.Schema.from_pandas(df, preserve_index=False)
+            for col in df.columns[df.isna().all().to_numpy()]:
+                dtype = self.dtypes.get(col)
+                kind = pa.Schema.from_pandas(pd.DataFrame({col: pd.Series(dtype=dtype)})).field(col).type \
+                    if dtype is not None else pa.string()
+                schema = schema.set(schema.get_field_index(col), pa.field(col, kind))
+            self._schema = schema
+            self._handle = pq.ParquetWriter(self.output_file, self._schema)
+        elif self.fmt in ('xlsx', 'xlsx-stream'):
+            from openpyxl import Workbook
+            self._handle = Workbook(write_only=True)
+            self._sheet = self._handle.create_sheet()
+            self._sheet.append(list(df.columns))
+        elif self.fmt == 'csv.gz':
+            import gzip
+            self._handle = gzip.open(self.output_file, 'wt', newline='')
+        else:
+            self._handle = open(self.output_file, 'w', newline='')
+
+    def close(self):
+        if self._handle is not None:
+            if self.fmt in ('xlsx', 'xlsx-stream'):
+                self._handle.save(self.output_file)
+            else:
+                self._handle.close()
+            self._handle = None
+
+
+# ===============================
+# STAGE TIMING / PROFILING
+# ===============================
+def _rss_bytes():
+    # Process ki current resident memory (Linux /proc), warna peak RSS
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        try:
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        except ImportError:
+            return 0
+
+
+class Stage:
+    def __init__(self, name, depth, rows_in=None):
+        self.name = name
+        self.depth = depth
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.seconds = 0.0
+        self.memory_delta_mb = 0.0
+        self.error = None
+        self.profile = None
+
+    def rows(self, df):
+        # Stage ka output frame record karo (aur wahi return)
+        self.rows_out = None if df is None else len(df)
+        return df
+
+
+class StageTimer:
+    # Named stages: wall time, rows in/out, RSS memory delta; optional cProfile / pyinstrument
+    PROFILERS = (None, 'cprofile', 'pyinstrument')
+
+    def __init__(self, profiler=None):
+        if profiler not in self.PROFILERS:
+            raise ValueError(f"Unknown profiler: {profiler}")
+        self.profiler = profiler
+        self.stages = []
+        self.current = None
+        self._depth = 0
+
+    def stage(self, name, df=None):
+        return _StageContext(self, name, None if df is None else len(df))
+
+    def report(self):
+        # Same naam ke stages (e.g. har chunk) ko jod ke ek row
+        merged = {}
+        for st in self.stages:
+            row = merged.setdefault(st.name, {
+                'stage': st.name, 'depth': st.depth, 'calls': 0, 'seconds': 0.0,
+                'rows_in': None, 'rows_out': None, 'memory_delta_mb': 0.0, 'errors': [],
+            })
+            row['calls'] += 1
+            row['seconds'] += st.seconds
+            row['memory_delta_mb'] += st.memory_delta_mb
+            for key in ('rows_in', 'rows_out'):
+                value = getattr(st, key)
+                if value is not None:
+                    row[key] = (row[key] or 0) + value
+            if st.error:
+                row['errors'].append(st.error)
+            if st.profile:
+                row['profile'] = row.get('profile', '') + st.profile
+        rows = list(merged.values())
+        for row in rows:
+            row['seconds'] = round(row['seconds'], 4)
+            row['memory_delta_mb'] = round(row['memory_delta_mb'], 1)
+        total = sum(st.seconds for st in self.stages if st.depth == 0)
+        return {'total_seconds': round(total, 4), 'profiler': self.profiler, 'stages': rows}
+
+
+class _StageContext:
+    def __init__(self, timer, name, rows_in):
+        self.timer = timer
+        self.record = Stage(name, timer._depth, rows_in)
+
+    def __enter__(self):
+        timer = self.timer
+        self._parent = timer.current
+        timer.current = self.record.name
+        timer._depth += 1
+        self._profiler = self._start_profiler() if self.record.depth == 0 else None
+        self._rss = _rss_bytes()
+        self._start = time.perf_counter()
+        return self.record
+
+    def __exit__(self, exc_type, exc, tb):
+        record, timer = self.record, self.timer
+        record.seconds = time.perf_counter() - self._start
+        record.memory_delta_mb = (_rss_bytes() - self._rss) / 2**20
+        if exc is not None:
+            record.error = f"{exc_type.__name__}: {exc}"
+        if self._profiler is not None:
+            record.profile = self._stop_profiler(self._profiler)
+        timer._depth -= 1
+        timer.current = self._parent
+        timer.stages.append(record)
+        return False
+
+    def _start_profiler(self):
+        if self.timer.profiler == 'cprofile':
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+            return profiler
+        if self.timer.profiler == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                print("pyinstrument not installed, profiling skipped")
+                return None
+            profiler = Profiler()
+            profiler.start()
+            return profiler
+        return None
+
+    def _stop_profiler(self, profiler):
+        if self.timer.profiler == 'cprofile':
+            import pstats
+            profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(15)
+            return out.getvalue()
+        profiler.stop()
+        return profiler.output_text()
+
+
+# ===============================
+# INCREMENTAL RESULT CACHE
+# ===============================
+def _to_parquet(df, path):
+    # Mixed-type object columns (e.g. int + str IDs) pyarrow me fail hote hain -> str
+    try:
+        df.to_parquet(path, index=False)
+    except Exception:
+        df = df.copy()
+        for col in df.columns[df.dtypes == object]:
+            df[col] = df[col].map(lambda x: x if x is None or isinstance(x, float) and np.isnan(x) else str(x))
+        df.to_parquet(path, index=False)
+
+
+class _FileLock:
+    # Processes ke beech lock: O_EXCL se lock file banana atomic hai (Windows par bhi).
+    # Crash hue run ki chhodi hui file `stale` seconds baad hata di jaati hai.
+    def __init__(self, path, timeout=300, stale=600):
+        self.path = path
+        self.timeout = timeout
+        self.stale = stale
+
+    def __enter__(self):
+        deadline = time.time() + self.timeout
+        while True:
+            try:
+                os.close(os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return self
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self.path) > self.stale:
+                        os.remove(self.path)
+                        continue
+                except OSError:
+                    continue  # beech me release ho gaya
+                if time.time() > deadline:
+                    raise TimeoutError(f"Could not lock {self.path}")
+                time.sleep(0.05)
+
+    def __exit__(self, *exc):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+        return False
+
+
+class ResultCache:
+    # Cleaned rows disk par (Parquet, per marketplace), key = (Order Number, raw row hash).
+    # Jo raw rows status filter me drop hui unke keys alag file me, taaki dobara clean na hon.
+    # Size bound: max_rows se zyada hone par least-recently-used entries evict.
+    KEY_COLUMNS = ['__order', '__hash']
+
+    def __init__(self, cache_dir='.clean_cache', max_rows=2_000_000):
+        self.cache_dir = cache_dir
+        self.max_rows = max_rows
+
+    def _path(self, marketplace, part):
+        return os.path.join(self.cache_dir, f"{marketplace}.{part}.parquet")
+
+    def load(self, marketplace, version):
+        # Returns {'kept': frame, 'dropped': frame}, dono KEY_COLUMNS par indexed.
+        # version = BaseCleaner.cache_version(): catalog / code / spec / compact me se kuch bhi badla
+        # to purane rows stale hain (galat Brand/Category, dtypes ya cleaning rules)
+        entries = {}
+        for part in ('kept', 'dropped'):
+            path = self._path(marketplace, part)
+            if os.path.exists(path):
+                frame = pd.read_parquet(path)
+                if '__version' not in frame:
+                    continue  # purane format ki cache file
+                frame = frame[frame['__version'] == version]
+                entries[part] = frame.set_index(self.KEY_COLUMNS)
+        return entries
+
+    def store(self, marketplace, entries, version):
+        # Same marketplace ke parallel runs: lock ke andar disk wali files dobara padho aur apne entries
+        # unme merge karo (same key -> latest __used), warna baad me likhne wala pehle wale ke rows mita deta.
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with _FileLock(os.path.join(self.cache_dir, f"{marketplace}.lock")):
+            entries = dict(entries)
+            for part, current in self.load(marketplace, version).items():
+                frame = entries.get(part)
+                merged = current if frame is None else pd.concat([current, frame])
+                merged = merged.sort_values('__used', kind='stable')
+                entries[part] = merged[~merged.index.duplicated(keep='last')]
+            self._replace(marketplace, entries)
+
+    def _replace(self, marketplace, entries):
+        # LRU eviction dono parts par milake, phir atomic replace (padhne wale kabhi adhoori file nahi dekhte)
+        if sum(len(frame) for frame in entries.values()) > self.max_rows:
+            order = pd.concat([
+                pd.DataFrame({'part': part, 'pos': np.arange(len(frame)), 'used': frame['__used'].to_numpy()})
+                for part, frame in entries.items()
+            ], ignore_index=True)
+            keep = order.sort_values('used', ascending=False, kind='stable').head(self.max_rows)
+            entries = {
+                part: frame.iloc[np.sort(keep.loc[keep['part'] == part, 'pos'].to_numpy())]
+                for part, frame in entries.items()
+            }
+        for part, frame in entries.items():
+            tmp_path = self._path(marketplace, part) + f".{os.getpid()}.tmp"
+            _to_parquet(frame.reset_index(), tmp_path)
+            os.replace(tmp_path, self._path(marketplace, part))
+
 
 class BaseCleaner:
-    def __init__(self, file_path):
+    # NUB_PARTNERS / reports me is naam se pehchana jata hai
+    marketplace = None
+    # Raw export ka order number column (incremental cache key)
+    ORDER_COLUMN = None
+    # Streaming mode me ek chunk me kitni rows
+    CHUNK_SIZE = 200_000
+    # Parallel transform me ek partition kam se kam itni rows (chhoti files ek hi process me)
+    PARTITION_MIN_ROWS = 50_000
+    # Cleaning spec (cleaning_spec.py); None = data jaisa hai waisa
+    SPEC = None
+
+    def __init__(self, file_path, profile=None, spec=None, compact=False, workers=None):
         self.file_path = file_path
         self.data = None
+        # Badi file ki rows partitions me baant ke itne processes me transform (default: CPU count, 1 = serial)
+        self.workers = workers
+        # compact=True: low-cardinality columns category, ints downcast, prices float32 (spec 'compact')
+        self.compact = compact
+        # spec: dict ya YAML/JSON file path, class ke SPEC ko override karta hai
+        spec = load_spec(spec) if isinstance(spec, str) else spec
+        self.plan = compile_spec(spec or self.SPEC) if (spec or self.SPEC) else None
+        # Stage timings (read / date_parse / catalog_join / ...); profile: None / 'cprofile' / 'pyinstrument'
+        self.timer = StageTimer(profile)
+        # convert_date1 ke parse paths ka row count (format / dateutil / null)
+        self.date_stats = {}
+        # Catalog match: har tier ne kitni rows fill ki (+ 'unmatched'), chunks me jud ke
+        self.match_stats = {}
+        # clean_incremental: cache se aaye vs naye clean hue raw rows
+        self.cache_stats = {}
+        # iter_chunks: buffer input ke kitne bytes padhe ja chuke (streamed job ka progress)
+        self.bytes_read = 0
+
+    def read_options(self):
+        # Read time projection + explicit dtypes: sirf spec ke columns parse karo
+        if not (self.plan and self.plan.usecols):
+            return {}
+        dtypes = dict(self.plan.read_categories) if self.compact else {}
+        dtypes.update({col: dtype for col, dtype in self.plan.dtypes.items() if col in self.plan.usecols})
+        return {'usecols': self.plan.usecols, 'dtype': dtypes or None}
 
     def read_data(self):
         try:
-            self.data = pd.read_csv(self.file_path)
+            # Chunk by chunk padho aur status filter wahin lagao: peak memory = kaam ki rows + ek chunk
+            chunks = list(self.iter_chunks())
+            self.data = pd.concat(chunks) if chunks else pd.read_csv(open_source(self.file_path), nrows=0,
+                                                                      **self.read_options())
             print(f"Data Loaded: {self.data.shape}")
         except Exception as e:
             print(f"Error Reading File: {e}")
-
-    def save_data(self, output_file):
+            raise
+
+    def iter_chunks(self, chunksize=None):
+        # Input ko bounded-size chunks me padho (projection, dtypes, status filter pushdown)
+        source = open_source(self.file_path)
+        reader = pd.read_csv(source, chunksize=chunksize or self.CHUNK_SIZE, **self.read_options())
+        for chunk in reader:
+            self._track(source)
+            yield self.plan.prefilter(chunk) if self.plan else chunk
+
+    def _track(self, source):
+        # Buffer / file-like input me ab tak kitne bytes padhe (path input par pata nahi chalta)
+        if hasattr(source, 'tell'):
+            self.bytes_read = source.tell()
+
+    def stage(self, name, df=None):
+        # with self.stage('name', df) as st: ...; st.rows(out_df)
+        return self.timer.stage(name, df)
+
+    def stage_report(self):
+        report = self.timer.report()
+        report['marketplace'] = self.marketplace
+        report['file'] = describe_target(self.file_path)
+        if self.match_stats:
+            total = sum(self.match_stats.values())
+            report['catalog_match'] = [
+                {'tier': tier, 'rows': rows, 'rate': round(rows / total, 4) if total else 0.0}
+                for tier, rows in self.match_stats.items()
+            ]
+        return report
+
+    def errors(self):
+        # Kisi bhi stage me aaye errors. clean() / clean_chunked() exception print karke aage badh jaate hain,
+        # isliye data None na ho tab bhi result adhoora ho sakta hai - callers ye check karein.
+        return [f"{st.name}: {st.error}" for st in self.timer.stages if st.error]
+
+    def cache_version(self):
+        # ResultCache tag: catalog version, cleaning code, spec (override bhi) aur compact mode
+        spec = json.dumps(self.plan.spec if self.plan else None, sort_keys=True, default=str)
+        key = f"{master_catalog.refresh().version}|{code_version()}|{spec}|{self.compact}"
+        return hashlib.md5(key.encode()).hexdigest()
+
+    def save_stage_report(self, output_file):
+        with open(output_file, 'w') as f:
+            json.dump(self.stage_report(), f, indent=2, default=str)
+
+    def run_pipeline(self):
+        # clean() ka common flow: read -> transform -> finalize, har ek timed stage
+        with self.stage('read') as st:
+            self.read_data()
+            st.rows(self.data)
+        with self.stage('transform', self.data) as st:
+            self.data = st.rows(self.transform_partitioned(self.data))
+        with self.stage('finalize', self.data) as st:
+            self.data = st.rows(self.finalize(self.data))
+
+    def transform(self, df):
+        # Row-wise cleaning: compiled spec plan (select, date, derive, filter, replace, catalog, order)
+        return self.plan.run(self, df) if self.plan else df
+
+    def partition_count(self, rows):
+        workers = self.workers or os.cpu_count() or 1
+        return max(1, min(workers, rows // self.PARTITION_MIN_ROWS))
+
+    def transform_partitioned(self, df):
+        # transform() row-wise hai: rows ko contiguous partitions me baanto, process pool me
+        # clean karo aur original order me jodo. Sort jaise poore frame wale steps finalize() me.
+        parts = self.partition_count(len(df)) if self.plan else 1
+        if parts <= 1:
+            return self.transform(df)
+        # Catalog (data + indexes) parent me load; fork se workers ko bina copy ke milta hai
+        master_catalog.refresh()
+        bounds = np.linspace(0, len(df), parts + 1).astype(int)
+        frames = [df.iloc[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+        with self.stage('partitions', df) as st:
+            with _process_pool(parts, share_catalog=True) as pool:
+                results = list(pool.map(_transform_partition, [type(self)] * parts, [self.plan] * parts,
+                                        [self.compact] * parts, frames))
+            for _, stages, date_stats, match_stats in results:
+                for stats, total in ((date_stats, self.date_stats), (match_stats, self.match_stats)):
+                    for key, rows in stats.items():
+                        total[key] = total.get(key, 0) + rows
+                # Workers ke stages (date_parse, derive, catalog_join, ...) 'partitions' ke neeche;
+                # inka time sab workers ka jod hai, wall time nahi
+                for record in stages:
+                    record.depth += self.timer._depth
+                    self.timer.stages.append(record)
+            df = st.rows(self.plan.combine([frame for frame, _, _, _ in results], self.compact))
+        print(f"Partitions Cleaned: {parts} x ~{len(frames[0])} rows, {len(df)} kept")
+        return df
+
+    def finalize(self, df):
+        # Poore frame par lagne wale steps (e.g. sort) - sirf in-memory clean() me
+        return self.plan.finalize(df) if self.plan else df
+
+    def clean_chunked(self, output_file, chunksize=None, fmt=None, on_chunk=None):
+        # Streaming pipeline: chunk padho -> transform -> output me append.
+        # Peak memory chunk size se tay hoti hai, file size se nahi.
+        # on_chunk(cleaned): har likhe gaye chunk ke baad (e.g. summary / preview banane ke liye)
+        # Parquet: pehle chunk me khali columns ka type canonical dtypes se
+        order = (self.plan.order if self.plan is not None else None) or []
+        dtypes = {col: CANONICAL_DTYPES[CANONICAL_RENAME.get(col, col)] for col in order
+                  if CANONICAL_RENAME.get(col, col) in CANONICAL_DTYPES}
+        writer = ChunkWriter(output_file, fmt, dtypes)
+        chunks = self.iter_chunks(chunksize)
+        try:
+            for i in itertools.count(1):
+                with self.stage('read') as st:
+                    chunk = st.rows(next(chunks, None))
+                if chunk is None:
+                    break
+                with self.stage('transform', chunk) as st:
+                    cleaned = st.rows(self.transform(chunk))
+                with self.stage('write', cleaned):
+                    writer.write(cleaned)
+                if on_chunk is not None:
+                    on_chunk(cleaned)
+                print(f"Chunk {i} Cleaned: {writer.rows} rows written")
+            print(f"Data Saved to {output_file} ({writer.rows} rows)")
+        except Exception as e:
+            print(f"Error Cleaning Chunks: {e}")
+        finally:
+            writer.close()
+        return writer.rows
+
+    def clean_incremental(self, cache=None):
+        # Sirf naye / badle hue raw rows clean karo, baaki cache se
+        cache = cache or ResultCache()
+        try:
+            with self.stage('incremental'):
+                self._clean_incremental(cache)
+        except Exception as e:
+            print(f"Error Cleaning Incrementally: {e}")
+
+    def _clean_incremental(self, cache):
+        self.read_data()
+        raw = self.data
+        version = self.cache_version()
+        orders = raw[self.ORDER_COLUMN].astype(str) if self.ORDER_COLUMN in raw else pd.Series('', index=raw.index)
+        hashes = pd.util.hash_pandas_object(raw, index=False)
+        keys = pd.MultiIndex.from_arrays([orders.to_numpy(), hashes.to_numpy()], names=ResultCache.KEY_COLUMNS)
+
+        entries = cache.load(self.marketplace, version)
+        kept, dropped = entries.get('kept'), entries.get('dropped')
+        kept_hit = keys.isin(kept.index) if kept is not None else np.zeros(len(raw), dtype=bool)
+        dropped_hit = keys.isin(dropped.index) if dropped is not None else np.zeros(len(raw), dtype=bool)
+        new = ~(kept_hit | dropped_hit)
+
+        # Naye rows clean karo (transform raw index preserve karta hai)
+        parts = []
+        if kept_hit.any():
+            reused = kept.reindex(keys[kept_hit])
+            reused.index = raw.index[kept_hit]
+            parts.append(reused.drop(columns=['__version', '__used']))
+        fresh = self.transform_partitioned(raw[new]) if new.any() else None
+        if fresh is not None:
+            parts.append(fresh)
+        if parts:
+            self.data = self.finalize(pd.concat(parts).sort_index())
+        else:
+            self.data = self.transform(raw.iloc[:0])
+
+        # Cache update: naye entries + hits ka last-used time
+        now = pd.Timestamp.now().value
+        for part, frame, hit in (('kept', kept, kept_hit), ('dropped', dropped, dropped_hit)):
+            if frame is not None:
+                frame.loc[frame.index.isin(keys[hit]), '__used'] = now
+        if fresh is not None:
+            new_index = raw.index[new]
+            is_kept = new_index.isin(fresh.index)
+            fresh_kept = fresh.reindex(new_index[is_kept])
+            fresh_kept.index = keys[new][is_kept]
+            fresh_dropped = pd.DataFrame(index=keys[new][~is_kept])
+            for part, frame, old in (('kept', fresh_kept, kept), ('dropped', fresh_dropped, dropped)):
+                frame = frame.assign(__version=version, __used=now)
+                frame = frame[~frame.index.duplicated()]
+                entries[part] = frame if old is None else pd.concat([old, frame])
+        if entries:
+            cache.store(self.marketplace, entries, version)
+
+        self.cache_stats = {'cached': int((~new).sum()), 'cleaned': int(new.sum())}
+        print(f"Incremental Clean: {self.cache_stats}, output {self.data.shape}")
+
+    def map_nub_partner(self, partner_ids):
+        # Ek vectorized map poore column par (per-row apply nahi)
+        with self.stage('partner_map', partner_ids) as st:
+            return st.rows(partner_ids.map(nub_partner_table(self.marketplace)).fillna(NUB_PARTNER_DEFAULT))
+
+    def match_catalog(self, frame, tiers, compact=False):
+        # Multi-key fallback matching; per-tier hit counts match_stats me
+        with self.stage('catalog_join', frame) as st:
+            found, stats = master_catalog.match(frame, tiers, compact=compact)
+            st.rows(found)
+        for tier, rows in stats.items():
+            self.match_stats[tier] = self.match_stats.get(tier, 0) + rows
+        print(f"Catalog Match: {stats}")
+        return found
+
+    def save_data(self, output_file, fmt=None):
+        # fmt: xlsx / xlsx-stream / csv / csv.gz / parquet (default: extension se)
+        # output_file: path ya binary file-like (BytesIO / spooled_output()), tab fmt do
         try:
-            self.data.to_excel(output_file, index=False)
-            print(f"Data Saved to {output_file}")
+            with self.stage('save', self.data):
+                self._save_data(output_file, fmt)
         except Exception as e:
             print(f"Error Saving File: {e}")
 
-    def convert_date(self, column_name):
+    def _save_data(self, output_file, fmt):
+        fmt = output_format(output_file, fmt)
+        if fmt in ('xlsx', 'xlsx-stream'):
+            if len(self.data) >= EXCEL_MAX_ROWS:
+                raise ValueError(f"{len(self.data)} rows exceed Excel limit ({EXCEL_MAX_ROWS - 1}); use csv or parquet")
+            if len(self.data) > XLSX_STREAM_ROWS:
+                fmt = 'xlsx-stream'
+
+        if fmt == 'xlsx':
+            _excel_floats(self.data).to_excel(output_file, index=False)
+        elif fmt == 'xlsx-stream':
+            write_xlsx_stream(self.data, output_file)
+        elif fmt == 'parquet':
+            self.data.to_parquet(output_file, index=False)
+        elif fmt == 'csv.gz':
+            self.data.to_csv(output_file, index=False, compression='gzip')
+        else:
+            self.data.to_csv(output_file, index=False)
+        print(f"Data Saved to {describe_target(output_file)} ({fmt})")
+
+    def convert_date(self, column_name, data=None):
+        data = self.data if data is None else data
         try:
-            self.data[column_name] = pd.to_datetime(self.data[column_name])
+            with self.stage('date_parse', data):
+                data[column_name] = pd.to_datetime(data[column_name])
         except Exception as e:
             print(f"Error Converting Date: {e}")
 
-    def convert_date1(self, column_name):
+    def convert_date1(self, column_name, data=None):
+        data = self.data if data is None else data
         try:
-            # Har row pe parser chalayenge jo mixed formats handle kare
-            self.data[column_name] = self.data[column_name].apply(
-                lambda x: parser.parse(str(x), dayfirst=True) if pd.notnull(x) else None
-            )
+            # Mixed formats: format-wise vectorized parse, dateutil sirf leftovers par
+            with self.stage('date_parse', data):
+                data[column_name], stats = parse_mixed_dates(data[column_name], dayfirst=True)
+            for path, rows in stats.items():
+                self.date_stats[path] = self.date_stats.get(path, 0) + rows
+            print(f"Date Parse Paths ({column_name}): {stats}")
         except Exception as e:
             print(f"Error Converting Date: {e}")
 
 # Noon cleaner
 class NoonCleaner(BaseCleaner):
+    marketplace = 'Noon'
+    ORDER_COLUMN = 'item_nr'
+    SPEC = SPECS['Noon']
+
     def clean(self):
         try:
-            self.read_data()
-            
-            # Select and rename columns
-            self.data = self.data[['order_timestamp','item_nr','sku','status','id_partner','country_code',
-                                   'partner_sku','fulfillment_model','offer_price']]
-
-            self.data = self.data.rename(columns={
-                'order_timestamp':'Date',
-                'item_nr':'Order Number',
-                'sku':'SKU',
-                'status':'Status',
-                'id_partner':'Partner Id',
-                'country_code':'Country',
-                'partner_sku': 'Partner SKU',
-                'fulfillment_model':'Fullfilment',
-                'offer_price':'Sales_Price'
-            })
-
-            # Date conversion
-            self.convert_date('Date')
-
-            # Add Month, Month Number, Year
-            self.data.insert(1, 'Month', self.data['Date'].dt.strftime('%B'))
-            self.data.insert(2, 'Month Number', self.data['Date'].dt.month)
-            self.data.insert(3, 'Year', self.data['Date'].dt.year)
-
-            # Nub Partner
-            self.data.insert(8, 'Nub Partner', self.data['Partner Id'].apply(self.get_nub_partner))
-
-            self.data.insert(10,'Brand Name'," ")
-
-            # Blank columns initialization
-            self.data.insert(11,'Category'," ")
-            self.data.insert(12,'Sub-Category'," ")
-            self.data.insert(13,'Channel','Noon')
-            self.data.insert(14,'Channel Item Name'," ")
-
-            # Other columns
-            self.data.insert(18, 'QTY', 1)
-            self.data.insert(19, 'GMV', self.data['Sales_Price'] * self.data['QTY'])
-
-            # Filter irrelevant statuses
-            self.data = self.data[~self.data['Status'].isin([
-                'Unshipped', 'Pending','Undelivered','Confirmed','Created','Exported','Fulfilling','Could Not Be Delivered','Processing'
-            ])]
-
-            # Replace Country / Status / Fulfilment values
-            self.data['Country'] = self.data['Country'].replace({'SA':'Saudi', 'AE':'UAE'})
-            self.data['Status'] = self.data['Status'].replace({'Shipped':'Delivered','CIR':'Cancelled'})
-            self.data['Fullfilment'] = self.data['Fullfilment'].replace({'Fulfilled by Noon (FBN)':'FBN','Fulfilled by Partner (FBP)':'FBP'})
-
-            # ===============================
-            # FILL BLANKS FROM MASTER CSV (SKU BASIS – FIXED)
-            # ===============================
-            
-            # Clean SKU
-            self.data['SKU'] = self.data['SKU'].astype(str).str.strip()
-            master_df['SKU'] = master_df['SKU'].astype(str).str.strip()
-            
-            # Convert blank strings to NaN
-            cols = ['Brand Name', 'Category', 'Sub-Category', 'Channel Item Name']
-            self.data[cols] = self.data[cols].replace(r'^\s*$', np.nan, regex=True)
-            
-            # Remove duplicate SKU from master (IMPORTANT)
-            master_df = master_df.drop_duplicates(subset='SKU')
-            
-            # MERGE FULL DATA (SKU BASIS)
-            self.data = self.data.merge(
-                master_df[['SKU', 'Brand', 'Category', 'Sub-Category', 'Product Titles']],
-                on='SKU',
-                how='left',
-                suffixes=('', '_master')
-            )
-            
-            # Fill blanks using merged columns
-            self.data['Brand Name'] = self.data['Brand Name'].fillna(self.data['Brand'])
-            self.data['Category'] = self.data['Category'].fillna(self.data['Category_master'])
-            self.data['Sub-Category'] = self.data['Sub-Category'].fillna(self.data['Sub-Category_master'])
-            self.data['Channel Item Name'] = self.data['Channel Item Name'].fillna(self.data['Product Titles'])
-            
-            # Drop helper columns
-            self.data.drop(
-                columns=['Brand', 'Category_master', 'Sub-Category_master', 'Product Titles'],
-                inplace=True
-            )
-            
-            # ===============================
-            # ✅ GMV = 0 WHERE STATUS IS CANCELLED
-            # ===============================
-            self.data.loc[self.data['Status'] == 'Cancelled', 'GMV'] = 0
+            self.run_pipeline()
         except Exception as e:
             print(f"Error Cleaning Noon Data: {e}")
 
-    def get_nub_partner(self, pid):
-        if pid in [46272, '46272']:
-            return 'Nub-Partner 46272'
-        elif pid in [181587, '181587']:
-            return 'Nub-Partner 181587'
-        elif pid in [47461, '47461']:
-            return 'Nub-Partner 47461'
-        elif pid in [74949, '74949']:
-            return 'Nub-Partner 74949'
+
+# ===============================
+# AMAZON SHEET INGESTION
+# ===============================
+# Pool workers ke liye parent ki badi shared state (e.g. Amazon workbook bytes), task args me nahi:
+# fork workers pool banne se pehle set hui state inherit karte hain, spawn / forkserver me initializer se
+_worker_state = {}
+
+
+def _init_worker(catalog_state, shared):
+    # spawn / forkserver context: parent ka loaded catalog + shared state worker me set karo
+    if catalog_state is not None:
+        master_catalog.__dict__.update(catalog_state)
+    _worker_state.update(shared)
+
+
+def _pool_method():
+    # Linux main thread par fork: workers parent ki loaded state (catalog) inherit karte hain.
+    # Threads (app ke JobStore jobs) se fork nahi: dusre thread ka pakda hua lock child me
+    # kabhi nahi chhoot'ta (deadlock). Wahan forkserver / spawn.
+    import multiprocessing
+    methods = multiprocessing.get_all_start_methods()
+    if 'fork' in methods and threading.current_thread() is threading.main_thread():
+        return 'fork'
+    return 'forkserver' if 'forkserver' in methods else 'spawn'
+
+
+@contextlib.contextmanager
+def _process_pool(workers, share_catalog=False, shared=None):
+    # shared: {name: value} jo workers _worker_state me padhte hain (har worker ko ek baar, har task ko nahi)
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    method = _pool_method()
+    shared = shared or {}
+    initializer, initargs = None, ()
+    if method == 'fork':
+        _worker_state.update(shared)  # copy nahi: children fork par inherit karte hain
+    elif share_catalog or shared:
+        # memoryview pickle nahi hota
+        shared = {name: bytes(value) if isinstance(value, memoryview) else value for name, value in shared.items()}
+        initializer, initargs = _init_worker, (master_catalog.__getstate__() if share_catalog else None, shared)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method),
+                                 initializer=initializer, initargs=initargs) as pool:
+            yield pool
+    finally:
+        if method == 'fork':
+            for name in shared:
+                _worker_state.pop(name, None)
+
+
+def _transform_partition(cleaner_class, plan, compact, frame):
+    # Process pool worker: ek row partition ka transform; stage timings + stats parent me jodne ke liye wapas
+    cleaner = cleaner_class(None, compact=compact, workers=1)
+    cleaner.plan = plan
+    frame = cleaner.transform(frame)
+    return frame, cleaner.timer.stages, cleaner.date_stats, cleaner.match_stats
+
+
+# pd.read_excel in strings (pandas ke default NA values) aur Excel error cells ko NaN padhta hai;
+# raw openpyxl rows me ye literal strings aate hain
+SHEET_NA_VALUES = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN', '<NA>', 'N/A',
+    'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+    '#NULL!', '#DIV/0!', '#VALUE!', '#REF!', '#NAME?', '#NUM!', '#GETTING_DATA',
+}
+
+
+def _sheet_frame(rows, header, sheet, plan=None):
+    # Sheet rows -> frame: duplicate header rows hatao, phir projection + status filter
+    # (plan se) DataFrame banne se pehle, taaki unwanted columns/rows kabhi allocate na hon
+    columns = [f'Unnamed: {i}' if name is None else name for i, name in enumerate(header)]
+    rows = [row for row in rows if row[0] != columns[0]]  # Remove duplicate header rows
+    if plan is not None and plan.usecols:
+        keep = [i for i, name in enumerate(columns) if name in plan.usecols]
+        if plan.status_filter and plan.status_filter[0] in columns:
+            status_index = keep.index(columns.index(plan.status_filter[0]))
         else:
-            return 'Null'
+            status_index = None
+        pick = operator.itemgetter(*keep)
+        rows = [pick(row) for row in rows]
+        if len(keep) == 1:
+            rows = [(value,) for value in rows]
+        columns = [columns[i] for i in keep]
+        if status_index is not None:
+            drop = set(plan.status_filter[1])
+            rows = [row for row in rows if row[status_index] not in drop]
+    df = pd.DataFrame(rows, columns=columns)
+    for col in df.columns:
+        if df[col].dtype.kind not in 'iufcbmM':
+            na = df[col].isin(SHEET_NA_VALUES)
+            if na.any():
+                df[col] = df[col].mask(na)
+    df = df.dropna(how='all')
+    if plan is not None:
+        for col, dtype in plan.dtypes.items():
+            if col in df:
+                try:
+                    df[col] = df[col].astype(dtype)
+                except (TypeError, ValueError):
+                    pass  # mixed values: inferred dtype hi rehne do
+    df['Partner ID'] = sheet
+    return df
+
+
+def _read_open_sheet(wb, sheet, plan=None):
+    rows = wb[sheet].iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return None
+    return _sheet_frame(list(rows), header, sheet, plan)
+
+
+def _read_sheet(sheet, plan=None):
+    # Process pool worker: shared workbook bytes se sirf apni sheet parse karo
+    from openpyxl import load_workbook
+    wb = load_workbook(open_source(_worker_state['workbook']), read_only=True, data_only=True)
+    try:
+        return _read_open_sheet(wb, sheet, plan)
+    finally:
+        wb.close()
 
 
 # Amazon Cleaner 
 class AmazonCleaner(BaseCleaner):
-    def __init__(self, file_path):
-        super().__init__(file_path)
+    marketplace = 'Amazon'
+    ORDER_COLUMN = 'amazon-order-id'
+    SPEC = SPECS['Amazon']
+
+    def __init__(self, file_path, workers=None, profile=None, spec=None, compact=False):
+        # workers sheets parse karne me bhi lagte hain (har sheet alag process)
+        super().__init__(file_path, profile, spec, compact, workers)
         self.all_dataframes = []
 
+    def read_source(self):
+        # Workbook bytes ek hi baar disk se padho (upload buffer ho to wahi, copy nahi)
+        return source_bytes(self.file_path)
+
     def read_data(self):
         try:
-            # Sheet names detect karo
-            xls = pd.ExcelFile(self.file_path, engine='openpyxl')
-            available_sheets = xls.sheet_names
-
-            if len(available_sheets) > 1:
-                # Multiple sheet case
-                for sheet in available_sheets:
-                    df = pd.read_excel(self.file_path, sheet_name=sheet, engine='openpyxl')
-                    df['Partner ID'] = sheet
-                    df = df[df[df.columns[0]] != df.columns[0]]  # Remove duplicate header rows
-                    self.all_dataframes.append(df)
-                self.data = pd.concat(self.all_dataframes, ignore_index=True)
+            from openpyxl import load_workbook
+            source = self.read_source()
+            wb = load_workbook(open_source(source), read_only=True, data_only=True)
+            sheets = wb.sheetnames
+            workers = min(self.workers or os.cpu_count() or 1, len(sheets))
+
+            if workers > 1:
+                # Multiple sheets: har sheet alag process me parse
+                # Workbook har worker ko ek baar (fork me bilkul copy nahi), tasks me sirf sheet ka naam
+                wb.close()
+                with _process_pool(workers, shared={'workbook': source}) as pool:
+                    frames = list(pool.map(_read_sheet, sheets, [self.plan] * len(sheets)))
             else:
-                # Single sheet case
-                sheet = available_sheets[0]
-                df = pd.read_excel(self.file_path, sheet_name=sheet, engine='openpyxl')
-                df['Partner ID'] = sheet
-                df = df[df[df.columns[0]] != df.columns[0]]  # Remove duplicate header rows
-                self.data = df
-
+                # Single sheet / single worker: isi workbook se sab sheets
+                try:
+                    frames = [_read_open_sheet(wb, sheet, self.plan) for sheet in sheets]
+                finally:
+                    wb.close()
+
+            self.all_dataframes = [df for df in frames if df is not None]
+            self.data = pd.concat(self.all_dataframes, ignore_index=True)
             print(f"Amazon Sheets Read: {self.data.shape}")
 
         except Exception as e:
             print(f"Error Reading Amazon Sheets: {e}")
-
+            raise
+
+    def iter_chunks(self, chunksize=None):
+        # openpyxl read-only mode me sheet rows stream karo, chunk by chunk
+        from openpyxl import load_workbook
+        chunksize = chunksize or self.CHUNK_SIZE
+        source = open_source(self.file_path)
+        wb = load_workbook(source, read_only=True, data_only=True)
+        try:
+            for sheet in wb.sheetnames:
+                rows = wb[sheet].iter_rows(values_only=True)
+                header = next(rows, None)
+                if header is None:
+                    continue
+                batch = []
+                for row in rows:
+                    batch.append(row)
+                    if len(batch) >= chunksize:
+                        self._track(source)
+                        yield _sheet_frame(batch, header, sheet, self.plan)
+                        batch = []
+                if batch:
+                    self._track(source)
+                    yield _sheet_frame(batch, header, sheet, self.plan)
+        finally:
+            wb.close()
 
     def clean(self):
         try:
-            self.read_data()
-            self.data = self.data[['purchase-date','amazon-order-id','sku','item-status','Partner ID',
-                                   'ship-country','sales-channel','product-name','asin',
-                                   'fulfillment-channel','item-price','quantity']]
-
-            self.data = self.data.rename(columns={
-                'purchase-date': 'Date',
-                'amazon-order-id': 'Order Number',
-                'sku': 'SKU',
-                'item-status': 'Status',
-                'ship-country': 'Country',
-                'sales-channel': 'Channel',
-                'product-name': 'Channel Item Name',
-                'asin': 'Partner SKU',
-                'fulfillment-channel': 'Fulfillment',
-                'item-price': 'Sales price',
-                'quantity': 'QTY'
-            })
-
-            self.convert_date('Date')
-            self.data['Date'] = pd.to_datetime(self.data['Date'].dt.date)
-
-            self.data['Sales price'] = self.data['Sales price'].fillna(0)
-
-            # Add Month, Month Number, Year
-            self.data.insert(1, 'Month', self.data['Date'].dt.strftime('%B'))
-            self.data.insert(2, 'Month Number', self.data['Date'].dt.month)
-            self.data.insert(3, 'Year', self.data['Date'].dt.year)
-
-            # Nub Partner and Brand
-            self.data.insert(8, 'Nub Partner', self.data['Partner ID'].apply(self.get_nub_partner))
-            self.data.insert(10, 'Brand Name', " ")
-            self.data.insert(11, 'Category', " ")
-            self.data.insert(12, 'Sub-Category', " ")
-
-            # GMV
-            self.data.insert(19, 'GMV', self.data['Sales price'] * self.data['QTY'])
-
-            # Filter + Replace
-            self.data = self.data[~self.data['Status'].isin([
-                'Unshipped', 'Pending', 'Undelivered', 'Confirmed', 'Created', 'Exported', 'Fulfilling'
-            ])]
-
-            self.data['Country'] = self.data['Country'].replace({'SA': 'Saudi', 'AE': 'UAE', 'BH': 'Bahrain', 'KW': 'Kuwait', 'OM': 'Oman'})
-            self.data['Channel'] = self.data['Channel'].replace({'Amazon.ae': 'Amazon','Amazon.sa':'Amazon'})
-            self.data['Status'] = self.data['Status'].replace({'Shipped': 'Delivered'})
-            self.data['Fulfillment'] = self.data['Fulfillment'].replace({'Amazon': 'FBA'})
-
-            # ===============================
-            # ✅ FILL BLANKS FROM MASTER CSV (SKU ↔ Partner SKU)
-            # ===============================
-
-            # Clean columns
-            self.data['SKU'] = self.data['SKU'].astype(str).str.strip()
-            master_df['Partner SKU'] = master_df['Partner SKU'].astype(str).str.strip()
-
-            # Convert blank strings to NaN
-            cols = ['Brand Name', 'Category', 'Sub-Category']
-            self.data[cols] = self.data[cols].replace(r'^\s*$', np.nan, regex=True)
-
-            # 🔥 Lookup merge (SKU → Partner SKU)
-            lookup = self.data[['SKU']].merge(
-                master_df[['Partner SKU', 'Brand', 'Category', 'Sub-Category']],
-                left_on='SKU',
-                right_on='Partner SKU',
-                how='left'
-            )
-
-            # Fill only blank values
-            self.data['Brand Name'] = self.data['Brand Name'].fillna(lookup['Brand'])
-            self.data['Category'] = self.data['Category'].fillna(lookup['Category'])
-            self.data['Sub-Category'] = self.data['Sub-Category'].fillna(lookup['Sub-Category'])
-
-            # ===============================
-            # ✅ SET GMV = 0 WHERE STATUS IS CANCELLED
-            # ===============================
-            self.data.loc[self.data['Status']=='Cancelled', 'QTY'] = 1
-
-
+            self.run_pipeline()
             print(f"Cleaned Amazon Data Shape: {self.data.shape}")
         except Exception as e:
             print(f"Error Cleaning Amazon Data: {e}")
 
 
-    def get_nub_partner(self, pid):
-        if pid == 'Wishcare':
-            return 'Nub-Partner Wishcare'
-        elif pid == '100 MPH':
-            return 'Nub-Partner 100 MPH'
-        elif pid == '100_Miles':
-            return 'Nub-Partner 100_Miles'
-        else:
-            return 'Null'
-
-
 # Revibe Cleaner
 class RevibeCleaner(BaseCleaner):
+    marketplace = 'Revibe'
+    ORDER_COLUMN = 'id'
+    SPEC = SPECS['Revibe']
+
     def clean(self):
         try:
-            self.read_data()
-
-            # ✅ Step 1: Select Required Columns
-            self.data = self.data[['Last Update Date', 'id', 'SKU (Old: Order Status)', 'Shipment Status',
-                                   'Supplier', 'Country', 'Category', 'Condition', 'Model',
-                                   'Variation: Color, Storage, Condition', 'Actual Cost']]
-
-            # ✅ Step 2: Rename Columns for Standard Format
-            self.data = self.data.rename(columns={
-                'Last Update Date': 'Date',
-                'id': 'Order Number',
-                'SKU (Old: Order Status)': 'SKU',
-                'Shipment Status': 'Status',
-                'Supplier': 'Partner Id',
-                'Condition': 'Sub-Category',
-                'Actual Cost': 'Sales Price'
-            })
-
-
-            self.convert_date1('Date')
-            # Ab Date column ko standard format me set kar do (YYYY-MM-DD HH:MM:SS)
-            self.data['Date'] = pd.to_datetime(self.data['Date'])
-            self.data['Date'] = pd.to_datetime(self.data['Date'].dt.date)
-
-            # ✅ Step 4: Add Month, Month Number, Year Columns
-            self.data.insert(1, 'Month', self.data['Date'].dt.strftime('%B'))
-            self.data.insert(2, 'Month Number', self.data['Date'].dt.month)
-            self.data.insert(3, 'Year', self.data['Date'].dt.year)
-
-            # ✅ Step 5: Add Nub Partner, Brand, Channel, Fulfillment, QTY, GMV
-            self.data.insert(8, 'Nub-Partner', 'Revibe ' + self.data['Partner Id'].astype(str))
-            self.data.insert(10, 'Brand Name', 'Apple')
-            self.data.insert(13, 'Channel', 'Revibe')
-            self.data.insert(14, 'Channel Item Name', self.data['Model'] + ' ' + self.data['Variation: Color, Storage, Condition'])
-            self.data.insert(15, 'Partner SKU', self.data['SKU'])
-            self.data.insert(16, 'Fulfillment', 'FBR')
-            self.data.insert(20, 'QTY', 1)
-            self.data.insert(21, 'GMV', self.data['Sales Price'] * self.data['QTY'])
-
-            # ✅ Step 6: Drop Unnecessary Columns
-            self.data.drop(columns=['Model', 'Variation: Color, Storage, Condition'], inplace=True)
-
-            # ✅ Step 7: Standardize Values
-            self.data['Status'] = self.data['Status'].replace({
-                'Shipped': 'Delivered',
-                'At quality check': 'Delivered',
-                'Refused delivery': 'Delivered'
-            })
-            self.data['Country'] = self.data['Country'].replace({'United Arab Emirates': 'UAE'})
-
-            # ✅ Step 8: Sort by Date
-            self.data = self.data.sort_values(by='Date', ascending=True)
-
+            self.run_pipeline()
             print(f"✅ Revibe Cleaned Data Shape: {self.data.shape}")
         except Exception as e:
             print(f"❌ Error Cleaning Revibe Data: {e}")
 
 class TalabatCleaner(BaseCleaner):
+    marketplace = 'Talabat'
+    SPEC = SPECS['Talabat']
+
     def clean(self):
         try:
-            self.read_data()
-            # TODO: Add Talabat specific cleaning logic
-            print("Talabat cleaning not implemented yet.")
+            self.run_pipeline()
+            print(f"Cleaned Talabat Data Shape: {self.data.shape}")
         except Exception as e:
             print(f"Error Cleaning Talabat Data: {e}")
 
 class CareemCleaner(BaseCleaner):
+    marketplace = 'Careem'
+    SPEC = SPECS['Careem']
+
     def clean(self):
         try:
-            self.read_data()
-            # TODO: Add Careem specific cleaning logic
-            print("Careem cleaning not implemented yet.")
+            self.run_pipeline()
+            print(f"Cleaned Careem Data Shape: {self.data.shape}")
         except Exception as e:
             print(f"Error Cleaning Careem Data: {e}")
 
-# Example Usage
+# ===============================
+# BATCH CLI (directory / glob of exports)
+# ===============================
+CLEANERS = {
+    'Noon': NoonCleaner,
+    'Amazon': AmazonCleaner,
+    'Revibe': RevibeCleaner,
+    'Talabat': TalabatCleaner,
+    'Careem': CareemCleaner,
+}
+# Header ke in columns se marketplace pehchante hain
+MARKETPLACE_SIGNATURES = {
+    'Noon': {'item_nr', 'id_partner', 'order_timestamp'},
+    'Amazon': {'amazon-order-id', 'purchase-date', 'item-status'},
+    'Revibe': {'SKU (Old: Order Status)', 'Shipment Status', 'Last Update Date'},
+}
+INPUT_EXTENSIONS = ('.csv', '.xlsx', '.xls')
+
+
+def detect_marketplace(path, name=None):
+    # File header padh ke marketplace guess karo; na mile to None.
+    # path buffer ho sakta hai (upload); tab Excel zip signature (PK) se pehchante hain
+    if is_buffer(path):
+        excel = bytes(memoryview(path)[:2]) == b'PK'
+    else:
+        excel = str(name or describe_target(path)).lower().endswith(('.xlsx', '.xls'))
+    if excel:
+        from openpyxl import load_workbook
+        wb = load_workbook(open_source(path), read_only=True, data_only=True)
+        try:
+            header = next(wb[wb.sheetnames[0]].iter_rows(values_only=True), ())
+        finally:
+            wb.close()
+    else:
+        header = pd.read_csv(open_source(path), nrows=0).columns
+    columns = {str(c).strip() for c in header if c is not None}
+    for marketplace, signature in MARKETPLACE_SIGNATURES.items():
+        if signature <= columns:
+            return marketplace
+    return None
+
+
+def expand_inputs(inputs):
+    # Files, directories aur glob patterns -> sorted unique file list
+    import glob
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            files += [os.path.join(item, f) for f in os.listdir(item)]
+        else:
+            files += glob.glob(item)
+    return sorted({f for f in files if f.lower().endswith(INPUT_EXTENSIONS) and os.path.isfile(f)})
+
+
+# ===============================
+# CONSOLIDATED MULTI-MARKETPLACE RUN
+# ===============================
+# Combined dataset in columns par hive-partitioned (Channel=Noon/Year=2024/Month Number=1/...).
+# Bina date wali rows Year=0/Month Number=0 me (null partitions pyarrow read par unify nahi hote)
+CONSOLIDATE_PARTITIONS = ['Channel', 'Year', 'Month Number']
+
+
+def canonical_frame(df):
+    # Cleaned frame (kisi bhi marketplace ka) -> CANONICAL_COLUMNS, fixed dtypes
+    df = df.rename(columns=CANONICAL_RENAME).reindex(columns=CANONICAL_COLUMNS)
+    if df['Date'].dt.tz is not None:
+        df['Date'] = df['Date'].dt.tz_convert('UTC').dt.tz_localize(None)
+    # Categorical (compact) / int IDs pehle plain values, phir canonical dtype
+    df = df.astype({col: object for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)})
+    return df.astype(CANONICAL_DTYPES)
+
+
+def _canonical_schema():
+    import pyarrow as pa
+    empty = pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in CANONICAL_DTYPES.items()})
+    return pa.Schema.from_pandas(empty, preserve_index=False)
+
+
+def _consolidate_file(index, source, marketplace, root, chunksize=None):
+    # Process pool worker: ek input ko chunk by chunk clean karke dataset me likho.
+    # File names me (input index, chunk) hai, isliye parallel workers kabhi same file nahi likhte.
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    cleaner_class = CLEANERS[marketplace]
+    cleaner = cleaner_class(source, workers=1)
+    schema = _canonical_schema()
+    counts = []
+    for i, chunk in enumerate(cleaner.iter_chunks(chunksize)):
+        frame = canonical_frame(cleaner.transform(chunk))
+        if frame.empty:
+            continue
+        frame[['Year', 'Month Number']] = frame[['Year', 'Month Number']].fillna(0)
+        # pandas metadata nahi likhte: partition columns path se (dictionary) aate hain, metadata ke Int16 se takraate
+        table = pa.Table.from_pandas(frame, schema=schema, preserve_index=False).replace_schema_metadata(None)
+        pq.write_to_dataset(table, root,
+                            partition_cols=CONSOLIDATE_PARTITIONS,
+                            basename_template=f"part-{index:04d}-{i:05d}-{{i}}.parquet",
+                            existing_data_behavior='overwrite_or_ignore')
+        counts.append(frame.groupby(CONSOLIDATE_PARTITIONS, dropna=False).size())
+    rows = pd.concat(counts).groupby(level=CONSOLIDATE_PARTITIONS, dropna=False).sum() if counts else None
+    return index, marketplace, rows
+
+
+def consolidate(sources, root, workers=None, chunksize=None, on_done=None):
+    # sources: [(path / buffer, marketplace)] -> ek partitioned Parquet dataset (root).
+    # Files process pool me saath saath clean hote hain, har chunk seedha dataset me stream.
+    # Returns manifest: har (Channel, Year, Month Number) partition me kitni rows.
+    if os.path.isdir(root) and os.listdir(root):
+        raise ValueError(f"Output directory is not empty: {root}")
+    os.makedirs(root, exist_ok=True)
+    master_catalog.refresh()
+
+    results = [None] * len(sources)
+
+    def finished(index, marketplace, rows):
+        results[index] = rows
+        print(f"[{marketplace}] input {index + 1}/{len(sources)} consolidated "
+              f"({0 if rows is None else int(rows.sum())} rows)")
+        if on_done is not None:
+            on_done(index, marketplace)
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(sources)))
+    if workers == 1:
+        # Ek worker: pool ka koi fayda nahi, files isi process me ek ek karke
+        for i, (source, marketplace) in enumerate(sources):
+            finished(*_consolidate_file(i, source, marketplace, root, chunksize))
+        return _manifest(results)
+
+    with _process_pool(workers, share_catalog=True) as pool:
+        # Upload buffers (memoryview) / file-like pickle nahi hote: workers ko bytes bhejo
+        futures = [pool.submit(_consolidate_file, i,
+                               bytes(source_bytes(source)) if is_buffer(source) or hasattr(source, 'read') else source,
+                               marketplace, root, chunksize)
+                   for i, (source, marketplace) in enumerate(sources)]
+        for future in futures:
+            finished(*future.result())
+    return _manifest(results)
+
+
+def _manifest(results):
+    parts = [rows for rows in results if rows is not None]
+    if not parts:
+        return pd.DataFrame(columns=CONSOLIDATE_PARTITIONS + ['Rows'])
+    manifest = pd.concat(parts).groupby(level=CONSOLIDATE_PARTITIONS, dropna=False).sum()
+    return manifest.rename('Rows').reset_index()
+
+
+# ===============================
+# GMV / QTY SUMMARY (out-of-core aggregation)
+# ===============================
+# Cleaned data ko ek streaming pass me rollup: har chunk ka partial groupby-sum, phir merge.
+# Memory groups ki count se tay hoti hai, rows se nahi.
+SUMMARY_DIMENSIONS = ['Channel', 'Country', 'Nub Partner', 'Brand Name', 'Category', 'Year', 'Month Number']
+SUMMARY_MEASURES = ['GMV', 'QTY']
+# Itne partials jama hone par merge (har chunk par merge se sasta)
+SUMMARY_MERGE_EVERY = 16
+
+
+def _cancel_rules():
+    # Specs ke set_where rules (Noon: cancelled GMV = 0, Amazon: cancelled QTY = 1) Channel ke hisaab se.
+    # Summary inhe dobara lagata hai, taaki bahar se aaye / purane cleaned files bhi same numbers den.
+    rules = []
+    for marketplace, spec in SPECS.items():
+        for rule in spec.get('set_where', []):
+            rules.append((marketplace, rule['when'], rule['set']))
+    return rules
+
+
+class GMVAggregator:
+    def __init__(self, dimensions=None):
+        self.dimensions = dimensions or SUMMARY_DIMENSIONS
+        self.rows = 0
+        self._parts = []
+        self._rules = _cancel_rules()
+        # Padhne layak columns: dimensions + measures + cancel rules ke columns (Channel, Status),
+        # chahe ve dimensions me na hon - groupby se pehle hat jaate hain
+        rule_columns = ['Channel'] + [col for _, when, _ in self._rules for col in when]
+        self.columns = list(dict.fromkeys(self.dimensions + SUMMARY_MEASURES + rule_columns))
+
+    def add(self, df):
+        # Ek cleaned chunk (kisi bhi marketplace ke column names) ka partial aggregate
+        df = df.rename(columns=CANONICAL_RENAME)
+        df = df.reindex(columns=self.columns)
+        df = df.astype({col: object for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)})
+        for col in ('Year', 'Month Number'):
+            if col in self.dimensions:
+                df[col] = pd.to_numeric(df[col], errors='coerce').astype('Int64')
+        measures = {col: pd.to_numeric(df[col], errors='coerce').astype('float64') for col in SUMMARY_MEASURES}
+        for channel, when, values in self._rules:
+            mask = (df['Channel'] == channel).to_numpy(dtype=bool, na_value=False)
+            for col, value in when.items():
+                mask = mask & (df[col] == value).to_numpy(dtype=bool, na_value=False)
+            for col, value in values.items():
+                if col in measures:
+                    measures[col] = measures[col].mask(mask, value)
+        df = df[self.dimensions].assign(Orders=1, **measures)
+        self._parts.append(df.groupby(self.dimensions, dropna=False, sort=False).sum(min_count=1))
+        self.rows += len(df)
+        if len(self._parts) >= SUMMARY_MERGE_EVERY:
+            self._parts = [self._merge()]
+        return self
+
+    def _merge(self):
+        return pd.concat(self._parts).groupby(level=self.dimensions, dropna=False).sum(min_count=1)
+
+    def result(self):
+        if not self._parts:
+            return pd.DataFrame(columns=self.dimensions + ['Orders'] + SUMMARY_MEASURES)
+        summary = self._merge().reset_index()
+        summary['Orders'] = summary['Orders'].astype('int64')
+        qty = summary['QTY'].dropna()
+        if (qty == qty.round()).all():
+            summary['QTY'] = summary['QTY'].astype('Int64')
+        if 'Month Number' in summary:
+            names = dict(enumerate(calendar.month_name))
+            summary.insert(summary.columns.get_loc('Month Number') + 1, 'Month',
+                           summary['Month Number'].map(names, na_action='ignore'))
+        return summary[[col for col in summary.columns if col != 'Orders'] + ['Orders']]
+
+
+def iter_cleaned(path, chunksize=None, columns=None):
+    # Cleaned output (Parquet file / partitioned dataset dir / csv / csv.gz / xlsx) chunk by chunk.
+    # columns: sirf inhe padho (canonical ya marketplace naam dono chalte hain)
+    chunksize = chunksize or BaseCleaner.CHUNK_SIZE
+    wanted = None if columns is None else set(columns)
+    keep = (lambda name: True) if wanted is None else (lambda name: CANONICAL_RENAME.get(name, name) in wanted)
+    name = describe_target(path).lower()
+    if os.path.isdir(path) or name.endswith(('.parquet', '.pq')):
+        import pyarrow.dataset as ds
+        dataset = ds.dataset(path, format='parquet', partitioning='hive')
+        names = [field.name for field in dataset.schema if keep(field.name)]
+        for batch in dataset.to_batches(columns=names, batch_size=chunksize):
+            yield batch.to_pandas()
+    elif name.endswith(('.csv', '.gz')):
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=keep)
+    else:
+        from openpyxl import load_workbook
+        wb = load_workbook(open_source(path), read_only=True, data_only=True)
+        try:
+            for sheet in wb.sheetnames:
+                rows = wb[sheet].iter_rows(values_only=True)
+                header = next(rows, None)
+                if header is None:
+                    continue
+                picked = [i for i, col in enumerate(header) if col is not None and keep(col)]
+                columns_ = [header[i] for i in picked]
+                for batch in iter(lambda: list(itertools.islice(rows, chunksize)), []):
+                    yield pd.DataFrame([[row[i] for i in picked] for row in batch], columns=columns_)
+        finally:
+            wb.close()
+
+
+def summarize(paths, chunksize=None, dimensions=None):
+    # Kai cleaned outputs ka ek combined GMV / QTY summary (ek streaming pass)
+    aggregator = GMVAggregator(dimensions)
+    for path in paths:
+        for chunk in iter_cleaned(path, chunksize, aggregator.columns):
+            aggregator.add(chunk)
+    print(f"Summary: {aggregator.rows} rows aggregated")
+    return aggregator.result()
+
+
+def clean_file(path, marketplace, output_file, fmt=None, chunksize=None, cache_dir=None, stage_report=False,
+               compact=False, workers=1):
+    # Ek file clean karke output likho; CLI ke process pool me chalta hai
+    # (workers > 1: is file ki rows / sheets bhi parallel, jab files CPUs se kam hon)
+    cleaner = CLEANERS[marketplace](path, workers=workers, compact=compact)
+    written = False
+    if chunksize:
+        rows = cleaner.clean_chunked(output_file, chunksize=chunksize, fmt=fmt)
+        written = True
+    else:
+        if cache_dir:
+            cleaner.clean_incremental(ResultCache(cache_dir))
+        else:
+            cleaner.clean()
+        # Kisi stage me error = adhoora / raw data; aise output nahi likhte
+        if not cleaner.errors():
+            cleaner.save_data(output_file, fmt=fmt)
+            written = True
+        rows = len(cleaner.data) if cleaner.data is not None else 0
+    if stage_report:
+        cleaner.save_stage_report(output_file + '.stages.json')
+    errors = cleaner.errors()
+    if errors:
+        print(f"[{marketplace}] {path}: {errors[0]}")
+        if written and os.path.exists(output_file):
+            os.remove(output_file)  # partial chunked / failed save output
+        return path, marketplace, None, 0
+    return path, marketplace, output_file, rows
+
+
+def main(argv=None):
+    import argparse
+    from concurrent.futures import as_completed
+
+    arg_parser = argparse.ArgumentParser(description="Clean Noon / Amazon / Revibe sales exports in bulk")
+    arg_parser.add_argument('inputs', nargs='+', help="files, directories or glob patterns")
+    arg_parser.add_argument('-o', '--out-dir', help="output directory (default: next to each input)")
+    arg_parser.add_argument('-m', '--marketplace', choices=sorted(CLEANERS), help="skip detection, use this cleaner")
+    arg_parser.add_argument('-f', '--format', default='xlsx', choices=sorted(OUTPUT_FORMATS), help="output format")
+    arg_parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1, help="parallel processes")
+    arg_parser.add_argument('--chunksize', type=int, help="stream each file in chunks of this many rows")
+    arg_parser.add_argument('--cache-dir', help="incremental mode: reuse cleaned rows cached in this directory")
+    arg_parser.add_argument('--stage-report', action='store_true', help="write <output>.stages.json with stage timings")
+    arg_parser.add_argument('--compact', action='store_true', help="category / downcast dtypes for cleaned frames")
+    arg_parser.add_argument('--consolidate', metavar='DIR',
+                            help="write all inputs into one Channel/Year/Month partitioned Parquet dataset here")
+    arg_parser.add_argument('--summary', metavar='CSV', help="also write a GMV / QTY rollup of the cleaned outputs here")
+    args = arg_parser.parse_args(argv)
+
+    files = expand_inputs(args.inputs)
+    if not files:
+        print("No input files found.")
+        return 1
+
+    jobs = []
+    failed = 0
+    for path in files:
+        try:
+            marketplace = args.marketplace or detect_marketplace(path)
+        except Exception as e:
+            # e.g. legacy .xls / corrupt file: baaki batch chalta rahe
+            failed += 1
+            print(f"Skipping {path}: {e}")
+            continue
+        if marketplace is None:
+            print(f"Skipping {path}: marketplace not detected")
+            continue
+        out_dir = args.out_dir or os.path.dirname(path)
+        stem = os.path.splitext(os.path.basename(path))[0]
+        output_file = os.path.join(out_dir, f"Clean_{stem}{OUTPUT_FORMATS[args.format][0]}")
+        jobs.append((path, marketplace, output_file))
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+
+    if args.consolidate:
+        try:
+            manifest = consolidate([(path, marketplace) for path, marketplace, _ in jobs], args.consolidate,
+                                   workers=args.workers, chunksize=args.chunksize)
+        except Exception as e:
+            print(f"Error Consolidating Files: {e}")
+            return 1
+        print(manifest.to_string(index=False))
+        print(f"Done: {len(jobs)} files -> {args.consolidate} ({int(manifest['Rows'].sum())} rows)")
+        if args.summary:
+            summarize([args.consolidate], args.chunksize).to_csv(args.summary, index=False)
+            print(f"Summary saved to {args.summary}")
+        return 1 if failed else 0
+
+    # Catalog parent me ek baar load; workers ko share hota hai
+    master_catalog.refresh()
+
+    outputs = []
+    # Files CPUs se kam hon to bache processes har file ke andar (row partitions) lagte hain
+    file_workers = max(1, args.workers // max(1, len(jobs)))
+    with _process_pool(max(1, min(args.workers, len(jobs))), share_catalog=True) as pool:
+        futures = [pool.submit(clean_file, path, marketplace, output_file, args.format, args.chunksize, args.cache_dir,
+                               args.stage_report, args.compact, file_workers)
+                   for path, marketplace, output_file in jobs]
+        for future in as_completed(futures):
+            try:
+                path, marketplace, output_file, rows = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"Error Cleaning File: {e}")
+                continue
+            if output_file is None:
+                failed += 1
+                print(f"[{marketplace}] {path} -> FAILED")
+            else:
+                outputs.append(output_file)
+                print(f"[{marketplace}] {path} -> {output_file} ({rows} rows)")
+
+    print(f"Done: {len(outputs)}/{len(outputs) + failed} files cleaned")
+    if args.summary and outputs:
+        summarize(sorted(outputs), args.chunksize).to_csv(args.summary, index=False)
+        print(f"Summary saved to {args.summary}")
+    return 1 if failed else 0
+
+
 if __name__ == "__main__":
-    # Noon Data Cleaning
-    noon = NoonCleaner("Noon_Sales_Data .csv")
-    noon.clean()
-    noon.save_data("Clean_Noon_Data.xlsx")
-
-    # Amazon
-    sheet_name = ["100 MPH", "100_Miles", "Wishcare"]
-    amazon = AmazonCleaner("Amazon_Sales_Data.xlsx",sheet_name)
-    amazon.clean()
-    amazon.save_data("Clean_Amazon_Data.xlsx")
-
-    # Revibe Data Cleaning
-    revibe = RevibeCleaner("Revibe_Sales_Data.csv")
-    revibe.clean()
-    revibe.save_data("Clean_Revibe_Data.xlsx")
+    raise SystemExit(main())
 
 
 